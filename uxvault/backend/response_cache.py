@@ -0,0 +1,235 @@
+"""
+Persistent on-disk cache of fetched responses.
+
+Fetched responses otherwise only live in session state and the execute_query TTL cache, so
+every new browser session or server restart downloads them again. ResponseCache keeps them
+in a SQLite database, one entry per (user, survey, select list), together with the
+high-water mark of the entry. ResponseStore reads an entry back on a cold load and then
+only fetches the responses submitted after its mark. Whole entries are evicted least
+recently used first once the cache grows past its size budget.
+"""
+
+import json
+import os
+import sqlite3
+import time
+from contextlib import closing
+from typing import List, Dict, Any, Optional, Tuple
+
+
+# Default location of the cache database
+DEFAULT_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".cache", "uxvault", "responses.sqlite3")
+
+# Default size budget of the cache (bytes of stored response JSON)
+DEFAULT_CACHE_MAX_BYTES = 512 * 1024 * 1024
+
+# Seconds to wait for another connection's write lock before failing
+CACHE_TIMEOUT_SECONDS = 30
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS cached_surveys (
+    user_id TEXT NOT NULL,
+    survey_id TEXT NOT NULL,
+    columns TEXT NOT NULL,
+    high_water_at TEXT,
+    high_water_id TEXT,
+    nbytes INTEGER NOT NULL DEFAULT 0,
+    last_used REAL NOT NULL,
+    PRIMARY KEY (user_id, survey_id, columns)
+);
+CREATE TABLE IF NOT EXISTS cached_responses (
+    user_id TEXT NOT NULL,
+    survey_id TEXT NOT NULL,
+    columns TEXT NOT NULL,
+    response_id TEXT NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (user_id, survey_id, columns, response_id)
+);
+"""
+
+
+class ResponseCache:
+    """
+    SQLite cache of response rows keyed by user, survey and select list.
+
+    Every call opens its own short-lived connection, so one instance can be shared between
+    Streamlit sessions (threads) and several server processes can share one file.
+    """
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH, max_bytes: int = DEFAULT_CACHE_MAX_BYTES):
+        """
+        Open or create the cache database.
+
+        Args:
+            path: Path of the SQLite file. Parent directories are created if needed.
+            max_bytes: Size budget; least recently used surveys are evicted past it.
+        """
+        self.path = path
+        self.max_bytes = max_bytes
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        with closing(self._connect()) as conn, conn:
+            conn.executescript(_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=CACHE_TIMEOUT_SECONDS)
+
+    @property
+    def nbytes(self) -> int:
+        """Size of every cached response, in bytes of JSON."""
+        with closing(self._connect()) as conn:
+            return conn.execute("SELECT COALESCE(SUM(nbytes), 0) FROM cached_surveys").fetchone()[0]
+
+    def cached_surveys(self, user_id: str, columns: str) -> List[str]:
+        """IDs of the surveys of a user cached for a select list."""
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                "SELECT survey_id FROM cached_surveys WHERE user_id = ? AND columns = ?",
+                (user_id, columns),
+            ).fetchall()
+        return [survey_id for survey_id, in rows]
+
+    def load(self, user_id: str, survey_id: str, columns: str) -> Optional[Tuple[List[Dict[str, Any]], Optional[Tuple[Any, Any]]]]:
+        """
+        Read the cached responses of a survey and mark them as recently used.
+
+        Args:
+            user_id: Owner of the survey.
+            survey_id: Survey to read.
+            columns: Select list the responses were fetched with.
+
+        Returns:
+            Tuple of (rows, high_water) with rows in the order they were stored, or None if
+            the survey is not cached.
+        """
+        key = (user_id, survey_id, columns)
+        with closing(self._connect()) as conn, conn:
+            entry = conn.execute(
+                "SELECT high_water_at, high_water_id FROM cached_surveys"
+                " WHERE user_id = ? AND survey_id = ? AND columns = ?",
+                key,
+            ).fetchone()
+            if entry is None:
+                return None
+            conn.execute(
+                "UPDATE cached_surveys SET last_used = ? WHERE user_id = ? AND survey_id = ? AND columns = ?",
+                (time.time(),) + key,
+            )
+            rows = conn.execute(
+                "SELECT data FROM cached_responses WHERE user_id = ? AND survey_id = ? AND columns = ? ORDER BY rowid",
+                key,
+            ).fetchall()
+
+        high_water = tuple(entry) if entry[1] is not None else None
+        return [json.loads(data) for data, in rows], high_water
+
+    def store(self, user_id: str, survey_id: str, columns: str, rows: List[Dict[str, Any]], high_water: Optional[Tuple[Any, Any]]) -> None:
+        """
+        Replace the cached responses of a survey with every response stored for it.
+
+        Calling it with no rows still records the survey (and its mark) as cached, so a
+        survey without responses is not refetched from scratch either.
+
+        Args:
+            user_id: Owner of the survey.
+            survey_id: Survey the rows belong to.
+            columns: Select list the rows were fetched with.
+            rows: All response rows of the survey, oldest first.
+            high_water: (submitted_at, id) of the newest response of the survey, or None.
+        """
+        key = (user_id, survey_id, columns)
+        with closing(self._connect()) as conn, conn:
+            conn.execute("DELETE FROM cached_responses WHERE user_id = ? AND survey_id = ? AND columns = ?", key)
+            self._write(conn, key, rows, high_water)
+
+    def append(self, user_id: str, survey_id: str, columns: str, rows: List[Dict[str, Any]], high_water: Optional[Tuple[Any, Any]]) -> bool:
+        """
+        Add newly fetched responses of a cached survey and move its high-water mark.
+
+        Nothing is written if the survey is not cached (never stored, or evicted, dropped or
+        pruned since): an entry made of the new rows alone would claim the whole history up
+        to the mark. The caller then stores the full response list instead.
+
+        Args:
+            user_id: Owner of the survey.
+            survey_id: Survey the rows belong to.
+            columns: Select list the rows were fetched with.
+            rows: New response rows, oldest first.
+            high_water: (submitted_at, id) of the newest response of the survey, or None.
+
+        Returns:
+            Whether the survey was cached and the rows were added.
+        """
+        key = (user_id, survey_id, columns)
+        with closing(self._connect()) as conn, conn:
+            # Take the write lock before the check, so no other connection evicts in between
+            conn.execute("BEGIN IMMEDIATE")
+            entry = conn.execute(
+                "SELECT 1 FROM cached_surveys WHERE user_id = ? AND survey_id = ? AND columns = ?",
+                key,
+            ).fetchone()
+            if entry is None:
+                return False
+            self._write(conn, key, rows, high_water)
+        return True
+
+    def _write(self, conn: sqlite3.Connection, key: Tuple[str, str, str], rows: List[Dict[str, Any]], high_water: Optional[Tuple[Any, Any]]) -> None:
+        """Insert rows into an entry, update its mark and size, and evict past the budget."""
+        high_water_at, high_water_id = high_water if high_water is not None else (None, None)
+        conn.executemany(
+            "INSERT OR IGNORE INTO cached_responses (user_id, survey_id, columns, response_id, data)"
+            " VALUES (?, ?, ?, ?, ?)",
+            [key + (str(row.get('id')), json.dumps(row)) for row in rows],
+        )
+        nbytes = conn.execute(
+            "SELECT COALESCE(SUM(LENGTH(data)), 0) FROM cached_responses"
+            " WHERE user_id = ? AND survey_id = ? AND columns = ?",
+            key,
+        ).fetchone()[0]
+        conn.execute(
+            "INSERT OR REPLACE INTO cached_surveys"
+            " (user_id, survey_id, columns, high_water_at, high_water_id, nbytes, last_used)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?)",
+            key + (high_water_at, high_water_id, nbytes, time.time()),
+        )
+        self._evict(conn)
+
+    def drop(self, user_id: str, survey_id: str, columns: Optional[str] = None) -> None:
+        """Remove a survey from the cache, for one select list or all of them."""
+        condition = "user_id = ? AND survey_id = ?" + (" AND columns = ?" if columns is not None else "")
+        params = (user_id, survey_id) + ((columns,) if columns is not None else ())
+        with closing(self._connect()) as conn, conn:
+            conn.execute(f"DELETE FROM cached_responses WHERE {condition}", params)
+            conn.execute(f"DELETE FROM cached_surveys WHERE {condition}", params)
+
+    def prune(self, user_id: str, survey_ids: List[str]) -> None:
+        """Remove the cached surveys of a user that are not in survey_ids, e.g. deleted ones."""
+        keep = set(survey_ids)
+        with closing(self._connect()) as conn:
+            cached = {survey_id for survey_id, in conn.execute(
+                "SELECT DISTINCT survey_id FROM cached_surveys WHERE user_id = ?", (user_id,)
+            )}
+        for survey_id in cached - keep:
+            self.drop(user_id, survey_id)
+
+    def clear(self) -> None:
+        """Remove every cached response."""
+        with closing(self._connect()) as conn, conn:
+            conn.execute("DELETE FROM cached_responses")
+            conn.execute("DELETE FROM cached_surveys")
+
+    def _evict(self, conn: sqlite3.Connection) -> None:
+        """Drop least recently used surveys until the cache fits in max_bytes."""
+        total = conn.execute("SELECT COALESCE(SUM(nbytes), 0) FROM cached_surveys").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        entries = conn.execute(
+            "SELECT user_id, survey_id, columns, nbytes FROM cached_surveys ORDER BY last_used"
+        ).fetchall()
+        for user_id, survey_id, columns, nbytes in entries:
+            if total <= self.max_bytes:
+                break
+            key = (user_id, survey_id, columns)
+            conn.execute("DELETE FROM cached_responses WHERE user_id = ? AND survey_id = ? AND columns = ?", key)
+            conn.execute("DELETE FROM cached_surveys WHERE user_id = ? AND survey_id = ? AND columns = ?", key)
+            total -= nbytes
@@ -0,0 +1,211 @@
+"""
+Session-level store of the responses shown on the dashboard.
+
+ResponseStore keeps the responses fetched so far and, for every loaded survey, a high-water
+mark: the (submitted_at, id) keyset cursor of the newest response already stored. A sync only asks
+each survey for the responses after its mark, so refreshing costs one small request per
+survey plus the new submissions, whatever the size of the history. The responses added and
+removed by a sync are returned so callers can hand them on as deltas, e.g. to a
+CooccurrenceAccumulator. Surveys can also be loaded one at a time with load_survey, so a
+dashboard only fetches the responses of the surveys someone opens.
+
+With a ResponseCache, loaded surveys and their marks are also persisted on disk, so a new
+session starts from the cached responses and only fetches what was submitted since.
+"""
+
+from typing import List, Dict, Any, Optional, Tuple
+
+from uxvault.backend.response_cache import ResponseCache
+from uxvault.backend.supabase_client import (
+    RESPONSES_ORDER_COLUMN,
+    RESPONSES_PAGE_SIZE,
+    RESPONSE_SUMMARY_COLUMNS,
+    get_user_survey_ids,
+    iter_user_surveys_responses,
+    rewind_cursor,
+)
+
+
+class ResponseStore:
+    """
+    Responses of the signed-in user, kept in sync incrementally.
+
+    Responses are never edited once submitted, so a stored response never needs refetching.
+    Only surveys can disappear (deleting a survey deletes its responses), which a sync
+    detects from the survey list.
+    """
+
+    def __init__(
+        self,
+        columns: str = RESPONSE_SUMMARY_COLUMNS,
+        page_size: int = RESPONSES_PAGE_SIZE,
+        cache: Optional[ResponseCache] = None,
+        user_id: Optional[str] = None
+    ):
+        """
+        Create an empty store.
+
+        Args:
+            columns: Select list used for every fetch, see supabase_client.response_columns.
+                Must include id, survey_id and submitted_at.
+            page_size: Maximum number of responses per request.
+            cache: Optional on-disk cache to read surveys from and write fetched responses to.
+            user_id: Owner of the responses, used to key the cache. The cache is only used
+                when both cache and user_id are given.
+        """
+        self.columns = columns
+        self.page_size = page_size
+        self.cache = cache if user_id is not None else None
+        self.user_id = user_id
+        self._rows: Dict[Any, Dict[str, Any]] = {}
+        self._survey_rows: Dict[Any, List[Any]] = {}
+        self._high_water: Dict[Any, Tuple[Any, Any]] = {}
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __contains__(self, response_id: Any) -> bool:
+        return response_id in self._rows
+
+    @property
+    def rows(self) -> List[Dict[str, Any]]:
+        """Stored responses, grouped by survey and in the order they were fetched within a survey."""
+        return [self._rows[response_id] for ids in self._survey_rows.values() for response_id in ids]
+
+    @property
+    def survey_ids(self) -> List[Any]:
+        """Surveys whose responses are loaded."""
+        return list(self._survey_rows)
+
+    def is_loaded(self, survey_id: Any) -> bool:
+        """Whether the responses of a survey have been fetched."""
+        return survey_id in self._survey_rows
+
+    def get(self, response_id: Any, default: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+        """Return a stored response by ID."""
+        return self._rows.get(response_id, default)
+
+    def survey_responses(self, survey_id: Any) -> List[Dict[str, Any]]:
+        """Stored responses of one survey, oldest first."""
+        return [self._rows[response_id] for response_id in self._survey_rows.get(survey_id, [])]
+
+    def high_water_mark(self, survey_id: Any) -> Optional[Tuple[Any, Any]]:
+        """(submitted_at, id) of the newest stored response of a survey, None if it has none."""
+        return self._high_water.get(survey_id)
+
+    def load_survey(self, client, survey_id: Any) -> List[Dict[str, Any]]:
+        """
+        Fetch the responses of one survey submitted after its high-water mark.
+
+        The first call for a survey loads all its responses; later calls only fetch new ones.
+
+        Args:
+            client: Authenticated Supabase client.
+            survey_id: Survey whose responses to fetch.
+
+        Returns:
+            The newly stored response rows.
+        """
+        return self._sync_survey(client, survey_id)
+
+    def forget_survey(self, survey_id: Any) -> List[Any]:
+        """
+        Drop a survey and its responses from the store.
+
+        Returns:
+            IDs of the dropped responses.
+        """
+        self._high_water.pop(survey_id, None)
+        response_ids = self._survey_rows.pop(survey_id, [])
+        for response_id in response_ids:
+            self._rows.pop(response_id, None)
+        return response_ids
+
+    def sync(self, client, survey_ids: Optional[List[Any]] = None, loaded_only: bool = False) -> Tuple[List[Dict[str, Any]], List[Any]]:
+        """
+        Fetch the responses submitted since the last sync and merge them into the store.
+
+        Args:
+            client: Authenticated Supabase client.
+            survey_ids: Current surveys of the user, newest first. Fetched when not given.
+            loaded_only: Only sync surveys already loaded, leaving the others to be loaded
+                on demand with load_survey.
+
+        Returns:
+            Tuple of (added, removed): the newly stored response rows, and the IDs of the
+            responses dropped because their survey was deleted.
+        """
+        survey_ids = list(survey_ids) if survey_ids is not None else get_user_survey_ids(client)
+
+        removed = []
+        for survey_id in set(self._survey_rows) - set(survey_ids):
+            removed.extend(self.forget_survey(survey_id))
+
+        # Surveys cached on disk load without refetching their history, so they count as loaded
+        cached = set()
+        if self.cache is not None:
+            self.cache.prune(self.user_id, survey_ids)
+            cached = set(self.cache.cached_surveys(self.user_id, self.columns))
+
+        added = []
+        for survey_id in survey_ids:
+            if not loaded_only or self.is_loaded(survey_id) or survey_id in cached:
+                added.extend(self._sync_survey(client, survey_id))
+
+        # Keep surveys in the order of the survey list
+        self._survey_rows = {
+            survey_id: self._survey_rows[survey_id] for survey_id in survey_ids if survey_id in self._survey_rows
+        }
+        return added, removed
+
+    def _sync_survey(self, client, survey_id: Any) -> List[Dict[str, Any]]:
+        """Fetch and store the responses of one survey past its high-water mark."""
+        added = []
+        cache_hit = False
+        if self.cache is not None and not self.is_loaded(survey_id):
+            cached = self.cache.load(self.user_id, survey_id, self.columns)
+            if cached is not None:
+                cache_hit = True
+                rows, high_water = cached
+                added.extend(self._merge(survey_id, rows))
+                if high_water is not None:
+                    self._high_water[survey_id] = high_water
+
+        # Read again from a little before the mark, for responses that committed late;
+        # _merge skips the rows already stored
+        high_water = self._high_water.get(survey_id)
+        pages = iter_user_surveys_responses(
+            client,
+            after=rewind_cursor(high_water) if high_water is not None else None,
+            page_size=self.page_size,
+            survey_id=survey_id,
+            columns=self.columns,
+            # A cached page would hide submissions made since it was cached
+            ttl=0,
+        )
+        self._survey_rows.setdefault(survey_id, [])
+        fetched = []
+        for page in pages:
+            fetched.extend(self._merge(survey_id, page))
+            last = page[-1]
+            self._high_water[survey_id] = (last.get(RESPONSES_ORDER_COLUMN), last.get('id'))
+
+        if self.cache is not None and (fetched or not cache_hit):
+            high_water = self._high_water.get(survey_id)
+            # A survey evicted from the cache since it was loaded is stored again in full
+            if not self.cache.append(self.user_id, survey_id, self.columns, fetched, high_water):
+                self.cache.store(self.user_id, survey_id, self.columns, self.survey_responses(survey_id), high_water)
+        return added + fetched
+
+    def _merge(self, survey_id: Any, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Store the rows not stored yet and return them."""
+        survey_rows = self._survey_rows.setdefault(survey_id, [])
+        added = []
+        for row in rows:
+            response_id = row.get('id')
+            if response_id in self._rows:
+                continue
+            self._rows[response_id] = row
+            survey_rows.append(response_id)
+            added.append(row)
+        return added
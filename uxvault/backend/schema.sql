@@ -21,6 +21,10 @@ CREATE TABLE responses (
     submitted_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
 );
 
+-- Keyset pagination of responses orders by (submitted_at, id); this index serves each page as a range scan
+CREATE INDEX responses_submitted_at_id_idx ON responses (submitted_at, id);
+CREATE INDEX responses_survey_id_submitted_at_id_idx ON responses (survey_id, submitted_at, id);
+
 -- Row Level Security (RLS) policies
 
 -- Surveys: Users can only access their own surveys
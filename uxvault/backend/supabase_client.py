@@ -1,3 +1,5 @@
+from datetime import datetime, timedelta
+
 import streamlit as st
 from st_supabase_connection import SupabaseConnection, execute_query
 
@@ -230,27 +232,294 @@ def get_user_surveys(client: SupabaseConnection = None, user_email: str = None):
         st.write(f"Error retrieving surveys: {e}")
         raise
 
-def get_user_surveys_responses(client: SupabaseConnection = None):
+# Survey columns with embedded response aggregates: the response count and the latest response
+SURVEY_SUMMARY_COLUMNS = "id,title,created_at,responses(count),latest_response:responses(submitted_at)"
+
+
+def get_user_survey_summaries(client: SupabaseConnection = None, ttl=0):
+    """
+    Retrieves one summary row per survey belonging to the authenticated user.
+
+    The response count and the latest response time are computed by the database through
+    embedded resources, so this is a single request whose size does not depend on the
+    number of responses.
+
+    Args:
+        client (SupabaseConnection): Authenticated Supabase client.
+        ttl (optional): How long execute_query caches the summaries. Not cached by default,
+            so refreshing shows new submissions.
+
+    Returns:
+        list: Dictionaries with id, title, created_at, response_count and last_response_at,
+            newest survey first.
+    """
+    query = (
+        client.table("surveys").select(SURVEY_SUMMARY_COLUMNS)
+        .order("created_at", desc=True)
+        .order(RESPONSES_ORDER_COLUMN, desc=True, foreign_table="latest_response")
+        .limit(1, foreign_table="latest_response")
+    )
+    response = execute_query(query, ttl=ttl)
+    if not response or getattr(response, 'data', None) is None:
+        error_msg = getattr(response, 'error', "No data or unknown error") if response else "No response data"
+        raise Exception(f"Failed to retrieve surveys: {error_msg}")
+
+    summaries = []
+    for row in response.data:
+        counts = row.pop("responses", None) or [{}]
+        latest = row.pop("latest_response", None) or [{}]
+        row["response_count"] = counts[0].get("count", 0)
+        row["last_response_at"] = latest[0].get(RESPONSES_ORDER_COLUMN)
+        summaries.append(row)
+    return summaries
+
+
+def get_user_survey_ids(client: SupabaseConnection = None, ttl=0):
     """
-    Retrieves all surveys and their responses belonging to the authenticated user.
+    Retrieves the IDs of the surveys belonging to the authenticated user.
+
+    Args:
+        client (SupabaseConnection): Authenticated Supabase client.
+        ttl (optional): How long execute_query caches the list. Not cached by default, so
+            surveys created or deleted since the last call are seen.
+
+    Returns:
+        list: Survey IDs, newest survey first.
+    """
+    response = execute_query(
+        client.table("surveys").select("id").order("created_at", desc=True),
+        ttl=ttl
+    )
+    if not response or getattr(response, 'data', None) is None:
+        error_msg = getattr(response, 'error', "No data or unknown error") if response else "No response data"
+        raise Exception(f"Failed to retrieve surveys: {error_msg}")
+    return [row.get('id') for row in response.data]
+
+# Number of responses requested per page; PostgREST caps a single response at 1000 rows by default
+RESPONSES_PAGE_SIZE = 1000
+
+# Responses are paged on (submitted_at, id): submitted_at orders them, the primary key breaks ties
+RESPONSES_ORDER_COLUMN = "submitted_at"
+
+# How far before a high-water mark a sync starts reading again. submitted_at is the start time
+# of the inserting transaction, so a response can commit after a sync that already saw newer ones
+RESPONSES_SYNC_OVERLAP_SECONDS = 5
+
+# Table columns every projection keeps: identity, grouping and the pagination key
+RESPONSE_KEY_COLUMNS = ("id", "survey_id", RESPONSES_ORDER_COLUMN)
+
+# Fields of the response_data JSON blob that projections can select individually
+RESPONSE_DATA_FIELDS = ("completed_at", "sorted_cards", "survey_config")
+
+# Maximum number of response IDs per id=in.(...) filter, keeping request URLs well under 8 KB
+RESPONSE_ID_CHUNK_SIZE = 150
+
+
+def response_columns(*fields: str) -> str:
+    """
+    PostgREST select list with the key columns and the given response_data fields.
+
+    Fields are selected with JSON paths (sorted_cards:response_data->sorted_cards), so only
+    they are sent instead of the whole response_data blob, which also embeds the full survey
+    configuration of every response.
+
+    Args:
+        *fields: Names from RESPONSE_DATA_FIELDS.
+
+    Returns:
+        str: Select list for client.table("responses").select(...).
+    """
+    unknown = [field for field in fields if field not in RESPONSE_DATA_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown response_data fields: {unknown}")
+    return ",".join(list(RESPONSE_KEY_COLUMNS) + [f"{field}:response_data->{field}" for field in fields])
+
+
+# What the survey selection list shows for each response
+RESPONSE_SUMMARY_COLUMNS = response_columns("completed_at")
+
+# What the card sorting analyses read from each response
+RESPONSE_ANALYSIS_COLUMNS = response_columns("sorted_cards")
+
+
+def _nest_response_data(rows: list) -> list:
+    """
+    Moves response_data fields selected by JSON path back under response_data.
+
+    Projected rows then have the same shape as select("*") rows, so code reading
+    row['response_data']['sorted_cards'] works with either.
+    """
+    for row in rows:
+        fields = {field: row.pop(field) for field in RESPONSE_DATA_FIELDS if field in row}
+        if fields:
+            row.setdefault("response_data", {}).update(fields)
+    return rows
+
+
+def _after_cursor_filter(cursor: tuple) -> str:
+    """
+    PostgREST or-filter selecting the rows that sort after cursor on (submitted_at, id).
+
+    Rows are ordered by submitted_at ascending with NULLs last, so rows without a timestamp
+    come after every timestamped row and are ordered by id among themselves. A cursor without
+    an id, as made by rewind_cursor, selects every row from its timestamp on.
+    """
+    submitted_at, response_id = cursor
+    if submitted_at is None:
+        return f'and({RESPONSES_ORDER_COLUMN}.is.null,id.gt.{response_id})'
+    # Timestamps contain reserved characters (":" "+" "."), so they are double quoted
+    if response_id is None:
+        return f'{RESPONSES_ORDER_COLUMN}.gte."{submitted_at}",{RESPONSES_ORDER_COLUMN}.is.null'
+    return (
+        f'{RESPONSES_ORDER_COLUMN}.gt."{submitted_at}",'
+        f'and({RESPONSES_ORDER_COLUMN}.eq."{submitted_at}",id.gt.{response_id}),'
+        f'{RESPONSES_ORDER_COLUMN}.is.null'
+    )
+
+
+def rewind_cursor(cursor: tuple, seconds: float = RESPONSES_SYNC_OVERLAP_SECONDS) -> tuple:
+    """
+    Moves a (submitted_at, id) cursor back in time so reading after it overlaps the rows already read.
+
+    A sync reading strictly after its high-water mark would miss a response whose
+    transaction started before the newest stored row but committed after the sync. Reading
+    from slightly earlier catches it; the rows read twice have to be skipped by the caller.
+
+    Args:
+        cursor (tuple): (submitted_at, id) of the newest row already read.
+        seconds (float, optional): Length of the overlap.
+
+    Returns:
+        tuple: (submitted_at, None) cursor selecting every row from the earlier time on, or
+            cursor unchanged if it has no timestamp.
+    """
+    submitted_at, _ = cursor
+    if submitted_at is None:
+        return cursor
+    if not isinstance(submitted_at, datetime):
+        submitted_at = datetime.fromisoformat(str(submitted_at).replace("Z", "+00:00"))
+    return (submitted_at - timedelta(seconds=seconds)).isoformat(), None
+
+
+def get_user_surveys_responses_page(client: SupabaseConnection = None, after: tuple = None, page_size: int = RESPONSES_PAGE_SIZE, survey_id: str = None, columns: str = "*", ttl="1m"):
+    """
+    Retrieves one page of the responses belonging to the authenticated user.
+
+    Uses keyset pagination: pages are ordered by (submitted_at, id) and each page starts
+    strictly after the cursor of the previous one, so every page is an index range scan
+    no matter how deep into the results it is, unlike offset pagination.
+
+    Args:
+        client (SupabaseConnection): Authenticated Supabase client.
+        after (tuple, optional): Cursor returned with the previous page, None for the first page.
+        page_size (int, optional): Maximum number of responses in the page.
+        survey_id (str, optional): Only return responses to this survey.
+        columns (str, optional): Select list, e.g. RESPONSE_SUMMARY_COLUMNS. Must include id
+            and submitted_at. Defaults to every column.
+        ttl (optional): How long execute_query caches the page.
+
+    Returns:
+        tuple: (rows, cursor) where rows is a list of response dictionaries and cursor is the
+            (submitted_at, id) of the last row, or None when there are no more pages.
+    """
+    query = client.table("responses").select(columns)
+    if survey_id is not None:
+        query = query.eq("survey_id", survey_id)
+    if after is not None:
+        query = query.or_(_after_cursor_filter(after))
+    query = query.order(RESPONSES_ORDER_COLUMN).order("id").limit(page_size)
+
+    response = execute_query(query, ttl=ttl)
+    if not response or getattr(response, 'data', None) is None:
+        error_msg = getattr(response, 'error', "No data or unknown error") if response else "No response data"
+        raise Exception(f"Failed to retrieve responses: {error_msg}")
+
+    rows = _nest_response_data(response.data)
+    if len(rows) < page_size:
+        return rows, None
+    last = rows[-1]
+    return rows, (last.get(RESPONSES_ORDER_COLUMN), last.get('id'))
+
+
+def iter_user_surveys_responses(client: SupabaseConnection = None, after: tuple = None, page_size: int = RESPONSES_PAGE_SIZE, survey_id: str = None, columns: str = "*", ttl="1m"):
+    """
+    Yields the responses belonging to the authenticated user one page at a time.
+
+    Args:
+        client (SupabaseConnection): Authenticated Supabase client.
+        after (tuple, optional): Only yield responses after this (submitted_at, id) cursor.
+        page_size (int, optional): Maximum number of responses per page.
+        survey_id (str, optional): Only return responses to this survey.
+        columns (str, optional): Select list, e.g. RESPONSE_SUMMARY_COLUMNS.
+        ttl (optional): How long execute_query caches each page.
+
+    Yields:
+        list: Response dictionaries, in (submitted_at, id) order across pages.
+    """
+    cursor = after
+    while True:
+        rows, cursor = get_user_surveys_responses_page(client, after=cursor, page_size=page_size, survey_id=survey_id, columns=columns, ttl=ttl)
+        if rows:
+            yield rows
+        if cursor is None:
+            return
+
+
+def get_responses_by_ids(client: SupabaseConnection = None, response_ids: list = None, columns: str = RESPONSE_ANALYSIS_COLUMNS, chunk_size: int = RESPONSE_ID_CHUNK_SIZE, ttl="10m"):
+    """
+    Retrieves specific responses, e.g. the ones selected for analysis.
+
+    IDs are sent in chunks of id=in.(...) filters to keep request URLs short.
+
+    Args:
+        client (SupabaseConnection): Authenticated Supabase client.
+        response_ids (list): IDs of the responses to fetch.
+        columns (str, optional): Select list. Defaults to what the analyses need.
+        chunk_size (int, optional): Maximum number of IDs per request.
+        ttl (optional): How long execute_query caches each chunk. Responses are never
+            updated, so they can be cached longer than listings.
+
+    Returns:
+        list: Response dictionaries, in the order of response_ids; missing IDs are skipped.
+    """
+    response_ids = list(dict.fromkeys(response_ids or []))
+    rows_by_id = {}
+    for start in range(0, len(response_ids), chunk_size):
+        chunk = response_ids[start:start + chunk_size]
+        response = execute_query(client.table("responses").select(columns).in_("id", chunk), ttl=ttl)
+        if not response or getattr(response, 'data', None) is None:
+            error_msg = getattr(response, 'error', "No data or unknown error") if response else "No response data"
+            raise Exception(f"Failed to retrieve responses: {error_msg}")
+        rows_by_id.update((row.get('id'), row) for row in _nest_response_data(response.data))
+    return [rows_by_id[response_id] for response_id in response_ids if response_id in rows_by_id]
+
+
+def get_user_surveys_responses(client: SupabaseConnection = None, page_size: int = RESPONSES_PAGE_SIZE, columns: str = "*"):
+    """
+    Retrieves all responses to the surveys belonging to the authenticated user.
+
+    Responses are fetched page by page with iter_user_surveys_responses; use that generator
+    directly to process them without holding every page at once.
+
+    Args:
+        client (SupabaseConnection): Authenticated Supabase client.
+        page_size (int, optional): Maximum number of responses per request.
+        columns (str, optional): Select list, e.g. RESPONSE_SUMMARY_COLUMNS.
+
+    Returns:
+        list: Response dictionaries ordered by (submitted_at, id).
     """
 
     if client is None or hasattr(client.auth.get_user(), 'user') and client.auth.get_user().user is None:
         st.write("You can't access surveys with responses without being logged in.")
         return []
     try:
-        # Use execute_query for database operations
-        response = execute_query(
-            client.table("responses").select("*") #.order("submitted_at", desc=True),
-            ,ttl="1m" # Cache surveys for 1 minute
-        )
-        
-        if response and hasattr(response, 'data') and response.data is not None:
-            return response
-        else:
-            error_msg = getattr(response, 'error', "No data or unknown error") if response else "No response data"
-            st.write(f"No surveys found or error retrieving surveys with responses: {error_msg}")
-            return []
+        rows = []
+        for page in iter_user_surveys_responses(client, page_size=page_size, columns=columns):
+            rows.extend(page)
+        if not rows:
+            st.write("No surveys found with responses.")
+        return rows
     except Exception as e:
         st.write(f"Error retrieving surveys with responses: {e}")
         raise
@@ -7,12 +7,24 @@ import numpy as np
 import plotly.graph_objects as go
 from st_supabase_connection import SupabaseConnection, execute_query
 
-import uxvault.backend.supabase_client as supa_client #import get_authenticated_client, get_user_surveys_responses    
+import uxvault.backend.supabase_client as supa_client #import get_authenticated_client
 importlib.reload(supa_client)
 get_authenticated_client = supa_client.get_authenticated_client
-get_user_surveys_responses = supa_client.get_user_surveys_responses
+get_responses_by_ids = supa_client.get_responses_by_ids
+from uxvault.backend.response_store import ResponseStore
+from uxvault.backend.response_cache import ResponseCache
 
 st.set_page_config(layout="wide")
+
+
+@st.cache_resource # one on-disk cache shared by every session of this server
+def _get_response_cache():
+    try:
+        return ResponseCache()
+    except Exception:
+        # No writable cache location: fall back to fetching from Supabase only
+        return None
+
 # Initialize connection without authentication.
 if hasattr(st, 'user') == False:
     st.error("User is not logged in. Please log in to access your dashboard.")
@@ -32,18 +44,30 @@ if refreshed or st.session_state.get('first_run',True):
         if st_supabase_client_authenticated is None:
             st.error("Authentication failed. Please log in again.")
             st.stop()
-        rows = get_user_surveys_responses(st_supabase_client_authenticated)
-        st.session_state['query_with_auth'] = rows
-        # Handle different response types - some have .data attribute, others are direct lists
-        try:
-            if hasattr(rows, 'data') and rows.data is not None:
-                st.session_state['query_with_auth_rows'] = rows.data
-            elif isinstance(rows, list):
-                st.session_state['query_with_auth_rows'] = rows
-            else:
-                st.session_state['query_with_auth_rows'] = []
-        except:
-            st.session_state['query_with_auth_rows'] = []
+        # First paint only needs one summary row per survey; responses are loaded per survey on demand
+        survey_summaries = supa_client.get_user_survey_summaries(st_supabase_client_authenticated)
+        st.session_state['survey_summaries'] = survey_summaries
+        # The store remembers how far each survey was synced, so a refresh only fetches
+        # responses submitted since the previous one, and only for surveys already loaded
+        response_store = st.session_state.get('response_store')
+        if response_store is None:
+            # Responses persist on disk per user, so a new session only fetches what changed
+            response_store = ResponseStore(cache=_get_response_cache(), user_id=getattr(st.user, 'email', None))
+            st.session_state['response_store'] = response_store
+        added, removed = response_store.sync(
+            st_supabase_client_authenticated,
+            survey_ids=[summary.get('id') for summary in survey_summaries],
+            loaded_only=True
+        )
+        # Pass the delta on to the selection; the accumulator then only counts these responses
+        for row in added:
+            if st.session_state.get(f"analyze_survey_{row.get('survey_id')}", False):
+                st.session_state[f"analyze_response_{row.get('id')}"] = True
+        for response_id in removed:
+            st.session_state.pop(f"analyze_response_{response_id}", None)
+        if not st.session_state.get('first_run', True) and (added or removed):
+            st.toast(f"{len(added)} new responses, {len(removed)} removed")
+        st.session_state['query_with_auth_rows'] = response_store.rows
         st.session_state['first_run'] = False
     except Exception as e:
         st.error(f"Error: {e}")
@@ -54,53 +78,64 @@ tab_select, tab_results = st.tabs(["Select Surveys", "Results"])
 
 with tab_select:
     st.subheader("Select Surveys to Analyze")
-    if 'query_with_auth' in st.session_state and st.session_state['query_with_auth'].data != []:
-        if 'query_with_auth_rows' in st.session_state:
-            # Group responses by survey_id so we can render each group in its own horizontal container
-            rows = st.session_state['query_with_auth_rows']
-            groups = {}
-            for row in rows:
-                sid = row.get('survey_id') or 'unknown'
-                groups.setdefault(sid, []).append(row)
-
-            def _toggle_group(survey_id, response_ids):
-                val = st.session_state.get(f"analyze_survey_{survey_id}", False)
-                for rid in response_ids:
-                    st.session_state[f"analyze_response_{rid}"] = val
-
-            for survey_id, group_rows in groups.items():
-                with st.container(horizontal=True, gap="medium"):
-                    st.subheader(f"Survey: {survey_id}")
-                    response_ids = [r.get('id') for r in group_rows]
-                    survey_key = f"analyze_survey_{survey_id}"
-                    if survey_key not in st.session_state:
-                        st.session_state[survey_key] = False
-                    st.checkbox("Toggle all responses in this survey", key=survey_key, on_change=_toggle_group, args=(survey_id, response_ids))
-
-                with st.container(horizontal=True, gap="large"):
-                    for row in group_rows:
-                        # Basic metadata / small card view
-                        with st.container(border=True, width=300):
-                            st.caption("Response ID" + row.get('id'))
-
-                            # Completed at and count of sorted cards
-                            response_data = row.get('response_data') or {}
-                            completed_at = response_data.get('completed_at') if isinstance(response_data, dict) else None
-                            sorted_cards = response_data.get('sorted_cards') if isinstance(response_data, dict) else []
-                            st.caption("Completed At")
-                            completed_at_fmtted = completed_at.split(".")[0] if completed_at else "N/A"
-                            st.write(completed_at_fmtted)
-
-                            st.caption("Sorted Cards")
-                            st.write(len(sorted_cards) if sorted_cards is not None else 0)
-
-                            # Checkbox to mark this response for further analysis
-                            analyze_key = f"analyze_response_{row.get('id')}"
-                            if analyze_key not in st.session_state:
-                                st.session_state[analyze_key] = False
-                            st.checkbox("Analyze this response", key=analyze_key)
-
-            # removed packaging button: Results tab will show surveys with survey-level toggle enabled
+    if st.session_state.get('survey_summaries'):
+        response_store = st.session_state['response_store']
+
+        def _load_survey(survey_id):
+            try:
+                added = response_store.load_survey(st_supabase_client_authenticated, survey_id)
+            except Exception as e:
+                st.error(f"Error loading responses: {e}")
+                return
+            val = st.session_state.get(f"analyze_survey_{survey_id}", False)
+            for row in added:
+                st.session_state[f"analyze_response_{row.get('id')}"] = val
+            st.session_state['query_with_auth_rows'] = response_store.rows
+
+        def _toggle_group(survey_id):
+            # Selecting a survey for analysis needs its responses, so load them first
+            if not response_store.is_loaded(survey_id):
+                _load_survey(survey_id)
+            val = st.session_state.get(f"analyze_survey_{survey_id}", False)
+            for row in response_store.survey_responses(survey_id):
+                st.session_state[f"analyze_response_{row.get('id')}"] = val
+
+        for summary in st.session_state['survey_summaries']:
+            survey_id = summary.get('id')
+            with st.container(horizontal=True, gap="medium", vertical_alignment="center"):
+                st.subheader(summary.get('title') or f"Survey: {survey_id}")
+                last_response_at = summary.get('last_response_at')
+                last_response_fmtted = last_response_at.split(".")[0].replace("T", " ") if last_response_at else "N/A"
+                st.caption(f"{summary.get('response_count', 0)} responses · last response {last_response_fmtted}")
+                survey_key = f"analyze_survey_{survey_id}"
+                if survey_key not in st.session_state:
+                    st.session_state[survey_key] = False
+                st.checkbox("Toggle all responses in this survey", key=survey_key, on_change=_toggle_group, args=(survey_id,))
+                if not response_store.is_loaded(survey_id) and summary.get('response_count', 0):
+                    st.button("Show responses", key=f"load_survey_{survey_id}", on_click=_load_survey, args=(survey_id,))
+
+            if not response_store.is_loaded(survey_id):
+                continue
+            with st.container(horizontal=True, gap="large"):
+                for row in response_store.survey_responses(survey_id):
+                    # Basic metadata / small card view
+                    with st.container(border=True, width=300):
+                        st.caption("Response ID" + row.get('id'))
+
+                        # Completed at
+                        response_data = row.get('response_data') or {}
+                        completed_at = response_data.get('completed_at') if isinstance(response_data, dict) else None
+                        st.caption("Completed At")
+                        completed_at_fmtted = completed_at.split(".")[0] if completed_at else "N/A"
+                        st.write(completed_at_fmtted)
+
+                        # Checkbox to mark this response for further analysis
+                        analyze_key = f"analyze_response_{row.get('id')}"
+                        if analyze_key not in st.session_state:
+                            st.session_state[analyze_key] = False
+                        st.checkbox("Analyze this response", key=analyze_key)
+
+        # removed packaging button: Results tab will show surveys with survey-level toggle enabled
     else:
         st.info("No results yet. Click button above to refresh.")
 
@@ -110,26 +145,94 @@ with tab_results: # complex data processing should be cached AND be done on a bu
     # see https://discuss.streamlit.io/t/keyed-widget-state-persistence-discussion-possible-fixes/37359/12
     st.subheader("Results")
     # Collect all selected responses with their data
-    selected_responses = []
-    if 'query_with_auth_rows' in st.session_state:
-        for row in st.session_state['query_with_auth_rows']:
-            response_id = row.get('id')
-            if st.session_state.get(f"analyze_response_{response_id}", False):
-                selected_responses.append(row)
+    selected_ids = [
+        row.get('id') for row in st.session_state.get('query_with_auth_rows', [])
+        if st.session_state.get(f"analyze_response_{row.get('id')}", False)
+    ]
+    # The listing only holds summaries: fetch the sorted cards of newly selected responses.
+    # Responses are never edited, so fetched rows are kept for the whole session
+    analysis_rows = st.session_state.setdefault('analysis_rows', {})
+    missing_ids = [rid for rid in selected_ids if rid not in analysis_rows]
+    if missing_ids and st_supabase_client_authenticated is not None:
+        try:
+            with st.spinner(f"Loading {len(missing_ids)} responses..."):
+                response_cache = _get_response_cache()
+                if response_cache is not None:
+                    # With the disk cache, sorted cards are fetched and cached per survey, so a new
+                    # session reads them from disk and only downloads responses submitted since
+                    analysis_store = st.session_state.get('analysis_store')
+                    if analysis_store is None:
+                        analysis_store = ResponseStore(
+                            columns=supa_client.RESPONSE_ANALYSIS_COLUMNS,
+                            cache=response_cache,
+                            user_id=getattr(st.user, 'email', None)
+                        )
+                        st.session_state['analysis_store'] = analysis_store
+                    listed_rows = {row.get('id'): row for row in st.session_state['query_with_auth_rows']}
+                    for survey_id in dict.fromkeys(listed_rows[rid].get('survey_id') for rid in missing_ids):
+                        for row in analysis_store.load_survey(st_supabase_client_authenticated, survey_id):
+                            analysis_rows[row.get('id')] = row
+                else:
+                    for row in get_responses_by_ids(st_supabase_client_authenticated, missing_ids):
+                        analysis_rows[row.get('id')] = row
+        except Exception as e:
+            st.error(f"Error: {e}")
+    selected_responses = [analysis_rows[rid] for rid in selected_ids if rid in analysis_rows]
 
     if selected_responses:
         # Import analysis functions
         from uxvault.utils.card_sorting_analysis import (
+            CooccurrenceAccumulator,
             build_analysis_dataframe,
-            build_comprehensive_category_analysis
+            build_comprehensive_category_analysis,
+            extract_response_columns,
+            selection_fingerprint
         )
+        from uxvault.utils.card_sorting_clustering import LINKAGE_METHODS, get_card_clustering
+        from uxvault.utils.card_sorting_bootstrap import DEFAULT_BOOTSTRAP_REPLICATES, bootstrap_cooccurrence
+        from uxvault.utils.card_sorting_neighbors import DEFAULT_MAX_NEIGHBORS, CardNeighborIndex
+        from uxvault.utils.card_sorting_agreement import (
+            build_participant_agreement,
+            segment_participants,
+            summarize_segments
+        )
+
+        from uxvault.utils.analysis_cache import AnalysisCache
+
+        def _compute_selected_analyses():
+            # Keep running counts in session state and only add/remove the responses whose
+            # checkbox changed since the last computation, instead of recounting the whole selection
+            accumulator = st.session_state.get('analysis_accumulator')
+            rows_by_id = st.session_state['analysis_rows']
+            selected_ids = {row.get('id') for row in selected_responses}
+            if accumulator is None or any(rid not in rows_by_id for rid in accumulator.response_ids - selected_ids):
+                # First run, or a refresh dropped responses we would need to subtract: start over
+                accumulator = CooccurrenceAccumulator()
+                st.session_state['analysis_accumulator'] = accumulator
+            for rid in accumulator.response_ids - selected_ids:
+                accumulator.remove(rows_by_id[rid])
+            accumulator.add_many(selected_responses)
+
+            # Parse the selection once and share it between both analysis tabs
+            response_columns = extract_response_columns(selected_responses)
+            return {
+                # Card x card matrices are kept as condensed upper triangles and expanded only for display
+                'cooccurrence': build_analysis_dataframe(selected_responses, accumulator=accumulator, columns=response_columns, condensed=True),
+                'category': build_comprehensive_category_analysis(selected_responses, accumulator=accumulator, columns=response_columns),
+            }
+
+        # Reruns that do not change the selection reuse the matrices computed earlier
+        if 'analysis_cache' not in st.session_state:
+            st.session_state['analysis_cache'] = AnalysisCache()
+        selection_key = selection_fingerprint(selected_responses)
+        analyses = st.session_state['analysis_cache'].get_or_compute(selection_key, _compute_selected_analyses)
 
         # Create tabs for different types of analysis
         analysis_tabs = st.tabs(["Card Co-occurrence", "Category Analysis"])
 
         with analysis_tabs[0]:  # Card Co-occurrence Analysis
             st.subheader("Card Co-occurrence Analysis")
-            analysis_data = build_analysis_dataframe(selected_responses)
+            analysis_data = analyses['cooccurrence']
 
             if analysis_data['cooccurrence'] is not None:
                 total_responses = len(selected_responses)
@@ -139,7 +242,7 @@ with tab_results: # complex data processing should be cached AND be done on a bu
                 st.write("Interactive visualization showing how often cards appear together:")
 
                 # Convert to percentage for better visualization
-                cooccurrence_percent = analysis_data['cooccurrence'].copy()
+                cooccurrence_percent = analysis_data['cooccurrence'].to_dataframe()
                 if total_responses > 0:
                     cooccurrence_percent = (cooccurrence_percent / total_responses * 100).round(1)
 
@@ -181,13 +284,92 @@ with tab_results: # complex data processing should be cached AND be done on a bu
                     st.metric("Card Pairs", f"{len(analysis_data['unique_cards']) * (len(analysis_data['unique_cards']) - 1) // 2}")
 
                 # Make similarity matrix less prominent (used for dendrograms)
+                with st.expander("🔎 Cards Most Like This One"):
+                    query_cards = st.multiselect("Cards", options=analysis_data['unique_cards'], key="neighbor_query_cards")
+                    n_neighbors = st.slider("Neighbours per card", min_value=1, max_value=DEFAULT_MAX_NEIGHBORS,
+                                            value=5, key="neighbor_query_k")
+                    if query_cards:
+                        # The index is built once per selection; each query then reads precomputed rows
+                        neighbor_index = st.session_state['analysis_cache'].get_or_compute(
+                            (selection_key, 'neighbors'),
+                            lambda: CardNeighborIndex(analysis_data['similarity'])
+                        )
+                        st.dataframe(neighbor_index.query(query_cards, n_neighbors).round(3), hide_index=True)
+
+                # Expander bodies run even when collapsed, so the matrices below are only
+                # computed once their toggle is switched on
                 with st.expander("📊 Advanced: Similarity Matrix (for dendrograms)"):
                     st.write("This matrix is used for hierarchical clustering and dendrogram visualization:")
-                    st.dataframe(analysis_data['similarity'])
+                    if st.toggle("Show similarity matrix", key="show_similarity_matrix"):
+                        st.dataframe(analysis_data['similarity'].to_dataframe())
 
                 with st.expander("📊 Advanced: Distance Matrix (for dendrograms)"):
                     st.write("This matrix is used for hierarchical clustering and dendrogram visualization:")
-                    st.dataframe(analysis_data['distance'])
+                    if st.toggle("Show distance matrix", key="show_distance_matrix"):
+                        st.dataframe(analysis_data['distance'].to_dataframe())
+
+                with st.expander("📊 Advanced: Card Dendrogram"):
+                    if st.toggle("Show dendrogram", key="show_card_dendrogram"):
+                        linkage_method = st.selectbox("Linkage method", options=LINKAGE_METHODS, key="dendrogram_linkage_method")
+                        optimal_ordering = st.toggle("Optimal leaf ordering", key="dendrogram_optimal_ordering",
+                                                     help="Places the most similar cards next to each other. Slower on large decks.")
+                        # Clustering is memoized per selection, so reruns only pay for it once
+                        clustering = get_card_clustering(
+                            analysis_data['distance'],
+                            selection_key,
+                            method=linkage_method,
+                            optimal_ordering=optimal_ordering
+                        )
+                        if clustering['dendrogram'] is not None:
+                            dendrogram = clustering['dendrogram']
+                            dendrogram_fig = go.Figure()
+                            for xs, ys in zip(dendrogram['icoord'], dendrogram['dcoord']):
+                                dendrogram_fig.add_trace(go.Scatter(x=xs, y=ys, mode='lines', line=dict(color='#636efa'),
+                                                                    hoverinfo='skip', showlegend=False))
+                            dendrogram_fig.update_layout(
+                                title='Card Dendrogram',
+                                xaxis=dict(tickmode='array', tickvals=[5 + 10 * i for i in range(len(dendrogram['ivl']))],
+                                           ticktext=dendrogram['ivl'], tickangle=-45),
+                                yaxis_title='Distance (1 - similarity)',
+                                height=600
+                            )
+                            st.plotly_chart(dendrogram_fig, use_container_width=True)
+                        else:
+                            st.info("At least two cards are needed to build a dendrogram.")
+
+                with st.expander("📊 Advanced: Co-occurrence Confidence Intervals"):
+                    st.write("Resamples participants to show how stable each co-occurrence percentage is:")
+                    with st.container(horizontal=True):
+                        n_replicates = st.number_input("Bootstrap replicates", min_value=100, max_value=10000,
+                                                       value=DEFAULT_BOOTSTRAP_REPLICATES, step=100,
+                                                       key="bootstrap_replicates")
+                        confidence = st.selectbox("Confidence level", options=[0.90, 0.95, 0.99], index=1,
+                                                  format_func=lambda level: f"{level:.0%}", key="bootstrap_confidence")
+                    bootstrap_key = (selection_key, 'bootstrap', int(n_replicates), confidence)
+                    analysis_cache = st.session_state['analysis_cache']
+                    if st.button("Compute confidence intervals", key="compute_bootstrap"):
+                        analysis_cache.put(bootstrap_key, bootstrap_cooccurrence(
+                            selected_responses, n_replicates=int(n_replicates), confidence=confidence, seed=0
+                        ))
+                    bootstrap = analysis_cache.get(bootstrap_key)
+                    if bootstrap is not None:
+                        st.dataframe(bootstrap.round(1), hide_index=True)
+
+                with st.expander("📊 Advanced: Participant Segments"):
+                    st.write("Groups participants whose sorts agree, i.e. who placed the same card pairs together:")
+                    if st.toggle("Segment participants", key="show_participant_segments"):
+                        agreement = st.session_state['analysis_cache'].get_or_compute(
+                            (selection_key, 'participant_agreement'),
+                            lambda: build_participant_agreement(selected_responses)
+                        )
+                        if len(agreement) < 2:
+                            st.info("At least two responses with an ID are needed to segment participants.")
+                        else:
+                            n_segments = st.slider("Number of segments", min_value=1, max_value=min(10, len(agreement)),
+                                                   value=min(3, len(agreement)), key="participant_segments")
+                            segments = segment_participants(agreement, n_segments)
+                            st.dataframe(summarize_segments(agreement, segments).round(3))
+                            st.dataframe(segments.rename_axis('response_id').reset_index(), hide_index=True)
 
             if analysis_data['unique_cards']:
                 st.write(f"### Cards in Analysis")
@@ -195,7 +377,21 @@ with tab_results: # complex data processing should be cached AND be done on a bu
 
         with analysis_tabs[1]:  # Category Analysis
             st.subheader("Category Analysis")
-            category_analysis = build_comprehensive_category_analysis(selected_responses)
+            category_analysis = analyses['category']
+
+            # Open sorts: fold "Billing", "billing " and "Bills" into one category before counting
+            if st.toggle("Merge similar category names", key="normalize_categories",
+                         help="Ignores case, extra spaces and plural or -ing endings, and merges near-identical spellings."):
+                category_analysis = st.session_state['analysis_cache'].get_or_compute(
+                    (selection_key, 'category', 'normalized'),
+                    lambda: build_comprehensive_category_analysis(selected_responses, normalize_categories=True)
+                )
+                if category_analysis['category_mapping']:
+                    with st.expander(f"Merged category names ({len(category_analysis['category_mapping'])})"):
+                        st.dataframe(pd.DataFrame(
+                            list(category_analysis['category_mapping'].items()),
+                            columns=['Original name', 'Merged into']
+                        ), hide_index=True)
 
             if category_analysis['category_matrix'] is not None:
                 st.write("### Category Assignment Matrix")
@@ -206,6 +402,31 @@ with tab_results: # complex data processing should be cached AND be done on a bu
                 st.write("Shows the proportion (0-1) of times each card was assigned to each category:")
                 st.dataframe(category_analysis['consistency_matrix'])
 
+                st.write("### Card Agreement")
+                st.write("How consistently participants placed each card. Low entropy and a high top share mean strong agreement:")
+                st.dataframe(
+                    category_analysis['card_agreement'],
+                    column_config={
+                        'placements': st.column_config.NumberColumn("Placements"),
+                        'top_category': st.column_config.TextColumn("Top Category"),
+                        'top_share': st.column_config.ProgressColumn("Top Share", min_value=0, max_value=1, format="%.2f"),
+                        'entropy': st.column_config.NumberColumn("Entropy (bits)", format="%.2f"),
+                        'categories_for_coverage': st.column_config.NumberColumn("Categories for 80%"),
+                    }
+                )
+
+                st.write("### Category Agreement")
+                st.write("How consistently the cards placed in each category were placed there:")
+                st.dataframe(
+                    category_analysis['category_agreement'],
+                    column_config={
+                        'placements': st.column_config.NumberColumn("Placements"),
+                        'cards_placed': st.column_config.NumberColumn("Cards Placed"),
+                        'primary_cards': st.column_config.NumberColumn("Primary Cards"),
+                        'agreement': st.column_config.ProgressColumn("Agreement", min_value=0, max_value=1, format="%.2f"),
+                    }
+                )
+
             if category_analysis['category_popularity'] is not None:
                 st.write("### Category Popularity Analysis")
 
@@ -214,13 +435,22 @@ with tab_results: # complex data processing should be cached AND be done on a bu
                 with col1:
                     st.write("#### Category Usage")
                     popularity = category_analysis['category_popularity']
-                    usage_df = pd.DataFrame({
-                        'Category': list(popularity['category_usage'].keys()),
-                        'Responses Using': list(popularity['category_usage'].values()),
-                        'Total Cards': list(popularity['category_counts'].values()),
-                        'Avg Cards/Response': [f"{val:.1f}" for val in popularity['average_cards_per_category'].values()]
-                    })
-                    st.dataframe(usage_df)
+                    category_stats = popularity['category_stats']
+                    st.dataframe(
+                        category_stats,
+                        column_config={
+                            'responses_using': st.column_config.NumberColumn("Responses Using"),
+                            'total_cards': st.column_config.NumberColumn("Total Cards"),
+                            'mean_cards': st.column_config.NumberColumn("Avg Cards/Response", format="%.1f"),
+                            'min_cards': st.column_config.NumberColumn("Min"),
+                            'p25_cards': st.column_config.NumberColumn("P25", format="%.1f"),
+                            'p50_cards': st.column_config.NumberColumn("Median", format="%.1f"),
+                            'p75_cards': st.column_config.NumberColumn("P75", format="%.1f"),
+                            'p90_cards': st.column_config.NumberColumn("P90", format="%.1f"),
+                            'max_cards': st.column_config.NumberColumn("Max"),
+                            'size_histogram': st.column_config.BarChartColumn("Cards per Response (0, 1, 2, ...)"),
+                        }
+                    )
 
                 with col2:
                     st.write("#### Category Statistics")
@@ -228,11 +458,10 @@ with tab_results: # complex data processing should be cached AND be done on a bu
                     st.write(f"**Total Categories Found:** {popularity['total_categories']}")
 
                     # Find most and least used categories
-                    if popularity['category_usage']:
-                        most_used = max(popularity['category_usage'].items(), key=lambda x: x[1])
-                        least_used = min(popularity['category_usage'].items(), key=lambda x: x[1])
-                        st.write(f"**Most Used Category:** {most_used[0]} ({most_used[1]} responses)")
-                        st.write(f"**Least Used Category:** {least_used[0]} ({least_used[1]} responses)")
+                    if not category_stats.empty:
+                        usage = category_stats['responses_using']
+                        st.write(f"**Most Used Category:** {usage.idxmax()} ({usage.max()} responses)")
+                        st.write(f"**Least Used Category:** {usage.idxmin()} ({usage.min()} responses)")
 
             if category_analysis['unique_categories']:
                 st.write(f"### Categories Found ({len(category_analysis['unique_categories'])})")
@@ -244,7 +473,8 @@ with tab_results: # complex data processing should be cached AND be done on a bu
             # Show raw data in expanders for advanced users
             with st.expander("📊 Advanced: Raw Analysis Data"):
                 for key, value in category_analysis.items():
-                    if key not in ['category_matrix', 'consistency_matrix', 'unique_cards', 'unique_categories']:
+                    if key not in ['category_matrix', 'consistency_matrix', 'card_agreement', 'category_agreement',
+                                   'unique_cards', 'unique_categories']:
                         st.write(f"**{key}:**")
                         st.write(value)
 
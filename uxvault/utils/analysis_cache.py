@@ -0,0 +1,211 @@
+"""
+In-memory caching of computed analysis results.
+
+Results are keyed by a selection fingerprint (see card_sorting_analysis.selection_fingerprint)
+so Streamlit reruns that do not change the selection reuse the matrices computed earlier.
+The cache evicts least recently used entries once it holds too many entries or its estimated
+size exceeds a memory budget. Lazy results (AnalysisResult) grow after they are cached, so
+the cache listens for their deferred entries being computed and re-measures them.
+"""
+
+import sys
+import threading
+import types
+from collections import OrderedDict
+from functools import partial
+from typing import Any, Callable, Hashable, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+
+# Default memory budget of one cache (estimated bytes of the cached values)
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+# Default maximum number of cached entries
+DEFAULT_MAX_ENTRIES = 32
+
+
+class AnalysisCache:
+    """
+    LRU cache of analysis results with a memory budget.
+
+    Entries are evicted least recently used first whenever the cache holds more than
+    max_entries values or their estimated size exceeds max_bytes. A single value larger than
+    the whole budget is returned to the caller but not stored.
+
+    A cache may be shared between Streamlit sessions, which run in separate threads, so every
+    access to the entries holds a lock. Values are computed and measured outside it.
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._sizes: "dict[Hashable, int]" = {}
+        self._watches: "dict[Hashable, List[Tuple[Any, Callable[[str], None]]]]" = {}
+        self.hits = 0
+        self.misses = 0
+        # Reentrant: discarding an entry from within eviction takes the lock again
+        self._lock = threading.RLock()
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def nbytes(self) -> int:
+        """Estimated size of every cached value."""
+        with self._lock:
+            return sum(self._sizes.values())
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return the value cached under key and mark it as recently used."""
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                return default
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return self._entries[key]
+
+    def put(self, key: Hashable, value: Any) -> None:
+        """Cache value under key, evicting older entries to stay within budget."""
+        size = estimate_nbytes(value)
+        with self._lock:
+            self.discard(key)
+            if size > self.max_bytes:
+                return
+
+            self._entries[key] = value
+            self._sizes[key] = size
+            self._watch(key, value)
+            self._evict()
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """
+        Return the cached value for key, computing and caching it on a miss.
+
+        Args:
+            key: Cache key, typically built from a selection fingerprint.
+            compute: Zero-argument function producing the value.
+        """
+        missing = object()
+        value = self.get(key, missing)
+        if value is not missing:
+            return value
+        value = compute()
+        self.put(key, value)
+        return value
+
+    def discard(self, key: Hashable) -> None:
+        """Remove key from the cache if present."""
+        with self._lock:
+            self._unwatch(key)
+            self._entries.pop(key, None)
+            self._sizes.pop(key, None)
+
+    def clear(self) -> None:
+        """Drop every cached value."""
+        with self._lock:
+            for key in list(self._watches):
+                self._unwatch(key)
+            self._entries.clear()
+            self._sizes.clear()
+
+    def _evict(self) -> None:
+        with self._lock:
+            while self._entries and (len(self._entries) > self.max_entries or self.nbytes > self.max_bytes):
+                key = next(iter(self._entries))
+                self.discard(key)
+
+    def _watch(self, key: Hashable, value: Any) -> None:
+        """Re-measure the entry under key whenever one of its lazy results computes an entry."""
+        for result in _pending_results(value):
+            listener = partial(self._remeasure, key)
+            result.add_compute_listener(listener)
+            self._watches.setdefault(key, []).append((result, listener))
+
+    def _unwatch(self, key: Hashable) -> None:
+        for result, listener in self._watches.pop(key, []):
+            result.remove_compute_listener(listener)
+
+    def _remeasure(self, key: Hashable, _computed_key: str) -> None:
+        value = self._entries.get(key)
+        if value is None:
+            return
+        size = estimate_nbytes(value)
+        with self._lock:
+            if self._entries.get(key) is not value:
+                return
+            # The entry was just read, so it is the most recently used one
+            self._entries.move_to_end(key)
+            if size > self.max_bytes:
+                self.discard(key)
+                return
+            self._sizes[key] = size
+            self._evict()
+
+
+def _pending_results(value: Any) -> Iterator[Any]:
+    """Lazy results with pending entries inside a cached value (dicts, lists and tuples are searched)."""
+    if hasattr(value, 'add_compute_listener'):
+        if value.has_pending():
+            yield value
+    elif isinstance(value, dict):
+        for item in value.values():
+            yield from _pending_results(item)
+    elif isinstance(value, (list, tuple)):
+        for item in value:
+            yield from _pending_results(item)
+
+
+def estimate_nbytes(value: Any, _seen: Optional[set] = None) -> int:
+    """
+    Estimate the memory held by an analysis result.
+
+    Counts array and DataFrame buffers exactly and walks dicts, lists and tuples recursively.
+    Objects referenced more than once, such as storage shared between a SymmetricMatrix and
+    its transformed views, are only counted once.
+
+    Args:
+        value: Any analysis output (DataFrame, ndarray, dict of results, ...).
+
+    Returns:
+        Estimated size in bytes.
+    """
+    _seen = set() if _seen is None else _seen
+    if id(value) in _seen:
+        return 0
+    _seen.add(id(value))
+
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True, deep=False).sum())
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(index=True, deep=False))
+    if isinstance(value, np.ndarray):
+        return int(value.nbytes)
+    if hasattr(value, 'computed_values'):
+        # Lazy results (AnalysisResult) hold the entries computed so far plus whatever their
+        # pending factories keep alive; the cache re-measures them as entries get computed
+        # Both temporaries stay referenced so their ids are not reused while _seen holds them
+        computed, pending = value.computed_values(), value.pending_inputs()
+        return sys.getsizeof(value) + estimate_nbytes(computed, _seen) + estimate_nbytes(pending, _seen)
+    if isinstance(getattr(value, 'storage', None), np.ndarray):
+        # SymmetricMatrix views share their storage array, which is only counted once
+        return estimate_nbytes(value.storage, _seen)
+    if sparse.issparse(value):
+        return int(sum(getattr(value, name).nbytes for name in ('data', 'indices', 'indptr') if hasattr(value, name)))
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(
+            estimate_nbytes(k, _seen) + estimate_nbytes(v, _seen) for k, v in value.items()
+        )
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return sys.getsizeof(value) + sum(estimate_nbytes(item, _seen) for item in value)
+    if hasattr(value, '__dict__') and not isinstance(value, (type, types.ModuleType)) and not callable(value):
+        # Plain containers such as ResponseColumns: count their attributes
+        return sys.getsizeof(value) + estimate_nbytes(vars(value), _seen)
+    return sys.getsizeof(value)
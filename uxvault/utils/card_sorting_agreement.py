@@ -0,0 +1,152 @@
+"""
+Participant x participant agreement for card sorting responses.
+
+Two participants agree on a card pair when both placed the two cards in the same group.
+Agreement between two responses is the Jaccard index of their sets of together pairs: the
+number of pairs both placed together divided by the number of pairs either placed together.
+All pairwise intersections come from products of the response x pair incidence matrix,
+computed in tiles of responses so memory stays bounded for thousands of participants. The result
+feeds the hierarchical clustering in card_sorting_clustering to segment participants.
+"""
+
+from typing import List, Dict, Any, Optional
+
+import numpy as np
+import pandas as pd
+
+from uxvault.utils.card_sorting_analysis import (
+    ResponseColumns,
+    build_response_pair_incidence,
+    extract_response_columns,
+)
+from uxvault.utils.card_sorting_clustering import assign_clusters, build_card_clustering
+from uxvault.utils.symmetric_matrix import SymmetricMatrix, complement
+
+
+# Maximum number of responses whose agreement rows are computed per product
+AGREEMENT_BLOCK_SIZE = 1000
+
+# Memory budget of one dense block of responses x card pairs. The number of pairs grows with
+# the square of the deck size, so blocks of large decks hold fewer responses
+AGREEMENT_BLOCK_BYTES = 32 * 1024 * 1024
+
+
+def build_participant_agreement(
+    responses: List[Dict[str, Any]],
+    columns: Optional[ResponseColumns] = None,
+    block_size: Optional[int] = None,
+    dtype: Any = np.float64
+) -> SymmetricMatrix:
+    """
+    Build the pairwise agreement matrix between responses.
+
+    Only responses with an ID are compared, as in the category analysis. Responses that never
+    grouped two cards together have an agreement of 0 with everyone else.
+
+    Args:
+        responses: List of response dictionaries from dashboard
+        columns: Optional result of extract_response_columns(responses).
+        block_size: Number of responses per block. Agreement is computed one
+            block_size x block_size tile at a time from two dense block_size x pairs blocks;
+            by default blocks hold up to AGREEMENT_BLOCK_SIZE responses and stay under
+            AGREEMENT_BLOCK_BYTES. Results do not depend on it.
+        dtype: Floating point dtype of the result. np.float32 halves memory.
+
+    Returns:
+        SymmetricMatrix (responses x responses) labelled by response ID, with values between
+        0 and 1 and 1 on the diagonal.
+    """
+    columns = columns if columns is not None else extract_response_columns(responses)
+    pair_incidence, _, _ = build_response_pair_incidence(columns)
+
+    rows = np.flatnonzero(columns.has_id())
+    labels = [str(columns.response_ids[i]) for i in rows]
+
+    # Agreement only depends on whether a pair was placed together, not how often
+    together = pair_incidence[rows].tocsr()
+    together.data = np.ones_like(together.data)
+    together.eliminate_zeros()
+    n_pairs = np.diff(together.indptr)
+
+    n = len(rows)
+    if block_size is None:
+        block_size = max(1, min(AGREEMENT_BLOCK_SIZE, AGREEMENT_BLOCK_BYTES // (4 * max(1, together.shape[1]))))
+    agreement = SymmetricMatrix(np.zeros(n * (n - 1) // 2, dtype=dtype), labels, diagonal=1)
+    values = agreement.storage
+    row_starts = {i: row_slice.start for i, row_slice in agreement.iter_row_slices()}
+
+    # Pair sets are dense enough (typically tens of percent of all pairs) that dense tiles
+    # multiplied with BLAS beat sparse products; only tiles on or above the diagonal are built
+    for start in range(0, n, block_size):
+        stop = min(start + block_size, n)
+        block_rows = together[start:stop].astype(np.float32).toarray()
+
+        for column_start in range(start, n, block_size):
+            column_stop = min(column_start + block_size, n)
+            block_columns = together[column_start:column_stop].astype(np.float32).toarray()
+
+            intersection = block_rows @ block_columns.T
+            union = n_pairs[start:stop, None] + n_pairs[None, column_start:column_stop] - intersection
+            tile = np.zeros(intersection.shape, dtype=dtype)
+            np.divide(intersection, union, out=tile, where=union > 0)
+
+            for i in range(start, min(stop, n - 1)):
+                first = max(i + 1, column_start)
+                if first >= column_stop:
+                    continue
+                offset = row_starts[i] + first - i - 1
+                values[offset:offset + column_stop - first] = tile[i - start, first - column_start:]
+
+    return agreement
+
+
+def segment_participants(
+    agreement: SymmetricMatrix,
+    n_segments: int,
+    method: str = 'average'
+) -> pd.Series:
+    """
+    Cluster participants into segments of people who sorted the cards alike.
+
+    Args:
+        agreement: Output of build_participant_agreement.
+        n_segments: Number of segments to cut the clustering into.
+        method: Linkage method, one of card_sorting_clustering.LINKAGE_METHODS.
+
+    Returns:
+        Series mapping each response ID to a segment number starting at 1.
+    """
+    clustering = build_card_clustering(agreement.transformed(complement), method=method, with_dendrogram=False)
+    segments = assign_clusters(clustering, n_segments)
+    segments.name = 'segment'
+    return segments
+
+
+def summarize_segments(agreement: SymmetricMatrix, segments: pd.Series) -> pd.DataFrame:
+    """
+    Size and mean within-segment agreement of each segment.
+
+    Args:
+        agreement: Output of build_participant_agreement.
+        segments: Output of segment_participants.
+
+    Returns:
+        DataFrame indexed by segment with columns participants and mean_agreement.
+    """
+    segment_ids, codes = np.unique(segments.reindex(agreement.labels).to_numpy(), return_inverse=True)
+    values = agreement.values
+
+    # Walk the condensed rows so the square matrix is never materialized
+    within_sums = np.zeros(len(segment_ids), dtype=np.float64)
+    within_pairs = np.zeros(len(segment_ids), dtype=np.int64)
+    for i, row_slice in agreement.iter_row_slices():
+        same = codes[i + 1:] == codes[i]
+        within_sums[codes[i]] += values[row_slice][same].sum()
+        within_pairs[codes[i]] += same.sum()
+
+    mean_agreement = np.full(len(segment_ids), np.nan)
+    np.divide(within_sums, within_pairs, out=mean_agreement, where=within_pairs > 0)
+    return pd.DataFrame({
+        'participants': np.bincount(codes, minlength=len(segment_ids)),
+        'mean_agreement': mean_agreement,
+    }, index=pd.Index(segment_ids, name='segment'))
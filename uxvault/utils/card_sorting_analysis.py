@@ -5,9 +5,123 @@ This module provides functions to process sorted card data from responses and bu
 dataframes suitable for dendrograms and co-occurrence matrix analysis.
 """
 
+import hashlib
+import multiprocessing
+import os
 import pandas as pd
 import numpy as np
-from typing import List, Dict, Any, Tuple
+from collections import Counter
+from collections.abc import MutableMapping
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from scipy import sparse
+from typing import List, Dict, Any, Tuple, Optional, Sequence, Iterable, Iterator, Union, Callable
+
+from uxvault.utils.category_normalization import (
+    DEFAULT_MERGE_THRESHOLD,
+    apply_category_mapping,
+    propose_category_merges,
+)
+from uxvault.utils.symmetric_matrix import SymmetricMatrix, complement
+
+
+# Selections with at least this many responses are counted in a process pool by default
+PARALLEL_RESPONSE_THRESHOLD = 10000
+
+# Number of responses handled by each process-pool task
+PARALLEL_CHUNK_SIZE = 2500
+
+# Start method of the counting pool. Forking a multithreaded process (such as a Streamlit
+# server) can deadlock the child, so workers come from a fork server, or are spawned where
+# fork servers are unavailable
+PARALLEL_START_METHOD = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+
+# Number of responses folded into the running counts at a time when streaming
+STREAMING_BATCH_SIZE = 500
+
+
+class CardVocabulary:
+    """
+    Interning table that maps card and category names to dense integer ids.
+
+    One vocabulary is shared by every stage of an analysis, so each name is hashed and
+    converted with str() once. The build functions then work on numpy arrays of ids, and
+    labels are only attached (in sorted order) when results are turned into DataFrames.
+    """
+
+    def __init__(self):
+        self._card_ids: Dict[str, int] = {}
+        self.card_labels: List[str] = []
+        self._category_ids: Dict[str, int] = {}
+        self.category_labels: List[str] = []
+
+    @property
+    def n_cards(self) -> int:
+        return len(self.card_labels)
+
+    @property
+    def n_categories(self) -> int:
+        return len(self.category_labels)
+
+    def card_id(self, card: Any) -> int:
+        """Return the id of a card, interning it if it is new."""
+        return self._intern(self._card_ids, self.card_labels, card)
+
+    def category_id(self, category: Any) -> int:
+        """Return the id of a category, interning it if it is new."""
+        return self._intern(self._category_ids, self.category_labels, category)
+
+    def encode_cards(self, cards: Sequence[Any]) -> np.ndarray:
+        """Encode a sequence of card names as an array of card ids."""
+        return self._encode(self._card_ids, self.card_labels, cards)
+
+    def encode_categories(self, categories: Sequence[Any]) -> np.ndarray:
+        """Encode a sequence of category names as an array of category ids."""
+        return self._encode(self._category_ids, self.category_labels, categories)
+
+    def sorted_card_ids(self, ids: Optional[np.ndarray] = None) -> np.ndarray:
+        """Return card ids (all of them by default) ordered by card name."""
+        return self._sorted_ids(self.card_labels, ids)
+
+    def sorted_category_ids(self, ids: Optional[np.ndarray] = None) -> np.ndarray:
+        """Return category ids (all of them by default) ordered by category name."""
+        return self._sorted_ids(self.category_labels, ids)
+
+    def card_names(self, ids: Sequence[int]) -> List[str]:
+        return [self.card_labels[i] for i in ids]
+
+    def category_names(self, ids: Sequence[int]) -> List[str]:
+        return [self.category_labels[i] for i in ids]
+
+    @staticmethod
+    def _intern(table: Dict[str, int], labels: List[str], value: Any) -> int:
+        label = str(value)
+        label_id = table.get(label)
+        if label_id is None:
+            label_id = len(labels)
+            table[label] = label_id
+            labels.append(label)
+        return label_id
+
+    @staticmethod
+    def _encode(table: Dict[str, int], labels: List[str], values: Sequence[Any]) -> np.ndarray:
+        # Short inputs (a single group) are cheaper to intern one by one
+        if len(values) < 64:
+            return np.array([CardVocabulary._intern(table, labels, value) for value in values], dtype=np.intp)
+
+        # Hash the values once in C and only intern the distinct ones
+        codes, uniques = pd.factorize(np.asarray(values, dtype=object), use_na_sentinel=False)
+        unique_ids = np.array([CardVocabulary._intern(table, labels, value) for value in uniques], dtype=np.intp)
+        return unique_ids[codes]
+
+    @staticmethod
+    def _sorted_ids(labels: List[str], ids: Optional[np.ndarray]) -> np.ndarray:
+        ids = np.arange(len(labels), dtype=np.intp) if ids is None else np.asarray(ids, dtype=np.intp)
+        if len(ids) == 0:
+            return ids
+        keys = np.empty(len(ids), dtype=object)
+        keys[:] = [labels[i] for i in ids]
+        return ids[np.argsort(keys, kind='stable')]
 
 
 def extract_sorted_cards_from_responses(responses: List[Dict[str, Any]]) -> Tuple[List[List[str]], List[str]]:
@@ -81,11 +195,321 @@ def extract_category_assignments_from_responses(responses: List[Dict[str, Any]])
     return category_assignments, list(set(processed_response_ids))
 
 
+class ResponseColumns:
+    """
+    Columnar view of a batch of responses, built by extract_response_columns in a single pass.
+
+    Per-response fields are plain lists aligned by response position. Every category of every
+    response is a "group", and card placements are stored as flat parallel int arrays:
+    group_codes, card_codes, category_codes and response_codes. Response IDs are indexed in a
+    dict so lookups by ID are hash-based.
+    """
+
+    def __init__(
+        self,
+        vocabulary: CardVocabulary,
+        response_ids: List[Any],
+        survey_ids: List[Any],
+        completed_at: List[Any],
+        sorted_cards: List[Dict[str, List[str]]],
+        groups: List[List[str]],
+        group_response: np.ndarray,
+        group_category: np.ndarray,
+        card_codes: np.ndarray
+    ):
+        self.vocabulary = vocabulary
+        self.response_ids = response_ids
+        self.survey_ids = survey_ids
+        self.completed_at = completed_at
+        self.sorted_cards = sorted_cards
+        self.groups = groups
+
+        # Per-group arrays
+        self.group_response = group_response
+        self.group_category = group_category
+        self.group_sizes = np.array([len(group) for group in groups], dtype=np.intp)
+
+        # Per-placement arrays
+        self.card_codes = card_codes
+        self.group_codes = np.repeat(np.arange(len(groups), dtype=np.intp), self.group_sizes)
+        self.category_codes = np.repeat(group_category, self.group_sizes)
+        self.response_codes = np.repeat(group_response, self.group_sizes)
+
+        self.positions = {response_id: i for i, response_id in enumerate(response_ids) if response_id}
+        self._counts = None
+
+    @property
+    def n_responses(self) -> int:
+        return len(self.response_ids)
+
+    @property
+    def n_groups(self) -> int:
+        return len(self.groups)
+
+    def has_id(self) -> np.ndarray:
+        """Boolean mask of responses that carry a response ID."""
+        return np.array([bool(response_id) for response_id in self.response_ids], dtype=bool)
+
+    def has_cards(self) -> np.ndarray:
+        """Boolean mask of responses with at least one non-empty group."""
+        return np.bincount(self.group_response[self.group_sizes > 0], minlength=self.n_responses) > 0
+
+    def groupings(self) -> List[List[str]]:
+        """Non-empty card groups in response order, as in extract_sorted_cards_from_responses."""
+        return [group for group in self.groups if group]
+
+    def category_assignments(self) -> Dict[str, Dict[str, List[str]]]:
+        """Mapping of response_id to {category_name: [cards]}, as in extract_category_assignments_from_responses."""
+        return {
+            response_id: sorted_cards
+            for response_id, sorted_cards in zip(self.response_ids, self.sorted_cards)
+            if response_id
+        }
+
+    def metadata(self, mask: Optional[np.ndarray] = None) -> List[Dict[str, Any]]:
+        """Response metadata rows for every response, or only those selected by a boolean mask."""
+        positions = range(self.n_responses) if mask is None else np.flatnonzero(mask)
+        return [
+            {
+                'response_id': self.response_ids[i],
+                'survey_id': self.survey_ids[i],
+                'completed_at': self.completed_at[i],
+            }
+            for i in positions
+        ]
+
+    def rows_for(self, response_ids: Sequence[Any]) -> np.ndarray:
+        """Positions of the given response IDs, skipping IDs that are not present."""
+        return np.array([self.positions[rid] for rid in response_ids if rid in self.positions], dtype=np.intp)
+
+    def counts(self, parallel: Optional[bool] = None, max_workers: Optional[int] = None) -> Dict[str, np.ndarray]:
+        """
+        Co-occurrence and category assignment counts for these responses, computed once.
+
+        Args:
+            parallel: Count response chunks in a process pool. By default this is enabled for
+                selections of at least PARALLEL_RESPONSE_THRESHOLD responses on multi-core hosts.
+            max_workers: Maximum number of worker processes (defaults to the CPU count).
+
+        Returns:
+            Dictionary containing, in vocabulary id order:
+            - 'cooccurrence': Card x card co-occurrence counts over all responses
+            - 'assignments': Card x category counts over responses that carry an ID
+        """
+        if self._counts is None:
+            if parallel is None:
+                parallel = self.n_responses >= PARALLEL_RESPONSE_THRESHOLD and (os.cpu_count() or 1) > 1
+            self._counts = _count_placements(self, parallel, max_workers)
+        return self._counts
+
+
+def extract_response_columns(
+    responses: List[Dict[str, Any]],
+    vocabulary: Optional[CardVocabulary] = None
+) -> ResponseColumns:
+    """
+    Parse responses once into a ResponseColumns structure shared by every analysis.
+
+    Responses without sorted card data are skipped. A response ID seen twice is only
+    counted the first time.
+
+    Args:
+        responses: List of response dictionaries from the dashboard.
+        vocabulary: Optional vocabulary to intern names into. A new one is created by default.
+
+    Returns:
+        ResponseColumns holding per-response metadata and flat placement arrays.
+    """
+    vocabulary = vocabulary if vocabulary is not None else CardVocabulary()
+
+    response_ids = []
+    survey_ids = []
+    completed_at = []
+    sorted_cards_per_response = []
+    seen_ids = set()
+
+    groups = []
+    group_response = []
+    categories = []
+    flat_cards = []
+
+    for response in responses:
+        response_id = response.get('id')
+        if response_id and response_id in seen_ids:
+            continue
+
+        response_data = response.get('response_data', {})
+        sorted_cards = response_data.get('sorted_cards', {}) if isinstance(response_data, dict) else {}
+        if not sorted_cards:
+            continue
+
+        position = len(response_ids)
+        if response_id:
+            seen_ids.add(response_id)
+        response_ids.append(response_id)
+        survey_ids.append(response.get('survey_id'))
+        completed_at.append(response_data.get('completed_at'))
+        sorted_cards_per_response.append(sorted_cards)
+
+        for category, cards in sorted_cards.items():
+            cards = cards if isinstance(cards, list) else []
+            groups.append(cards)
+            group_response.append(position)
+            categories.append(category)
+            flat_cards.extend(cards)
+
+    return ResponseColumns(
+        vocabulary=vocabulary,
+        response_ids=response_ids,
+        survey_ids=survey_ids,
+        completed_at=completed_at,
+        sorted_cards=sorted_cards_per_response,
+        groups=groups,
+        group_response=np.array(group_response, dtype=np.intp),
+        group_category=vocabulary.encode_categories(categories),
+        card_codes=vocabulary.encode_cards(flat_cards),
+    )
+
+
+def _count_placements(columns: ResponseColumns, parallel: bool, max_workers: Optional[int]) -> Dict[str, np.ndarray]:
+    """
+    Map-reduce the placement arrays of `columns` into co-occurrence and assignment counts.
+
+    Responses are split into chunks of PARALLEL_CHUNK_SIZE, each chunk is counted on its own
+    (in a ProcessPoolExecutor started with PARALLEL_START_METHOD when `parallel` is set) and
+    the partial counts are summed. Falls back to counting in this process if a pool cannot be
+    started.
+    """
+    n_cards, n_categories = columns.vocabulary.n_cards, columns.vocabulary.n_categories
+    with_id = columns.has_id()[columns.response_codes]
+
+    # Placements are stored in response order, so each response chunk is a contiguous slice
+    boundaries = np.searchsorted(columns.response_codes, np.arange(0, columns.n_responses, PARALLEL_CHUNK_SIZE))
+    boundaries = np.append(boundaries, len(columns.card_codes))
+    chunks = [
+        (
+            columns.group_codes[start:stop] - (columns.group_codes[start] if stop > start else 0),
+            columns.card_codes[start:stop],
+            columns.category_codes[start:stop],
+            with_id[start:stop],
+        )
+        for start, stop in zip(boundaries[:-1], boundaries[1:])
+    ]
+
+    partials = None
+    if parallel and len(chunks) > 1:
+        try:
+            with ProcessPoolExecutor(
+                max_workers=max_workers,
+                mp_context=multiprocessing.get_context(PARALLEL_START_METHOD)
+            ) as executor:
+                partials = list(executor.map(
+                    _count_chunk,
+                    *zip(*chunks),
+                    [n_cards] * len(chunks),
+                    [n_categories] * len(chunks),
+                ))
+        except (OSError, BrokenProcessPool):
+            partials = None
+    if partials is None:
+        partials = [_count_chunk(*chunk, n_cards, n_categories) for chunk in chunks]
+
+    cooccurrence = np.zeros((n_cards, n_cards), dtype=np.int64)
+    assignments = np.zeros((n_cards, n_categories), dtype=np.int64)
+    for partial_cooccurrence, partial_assignments in partials:
+        cooccurrence += partial_cooccurrence
+        assignments += partial_assignments
+    return {'cooccurrence': cooccurrence, 'assignments': assignments}
+
+
+def _count_chunk(
+    group_codes: np.ndarray,
+    card_codes: np.ndarray,
+    category_codes: np.ndarray,
+    with_id: np.ndarray,
+    n_cards: int,
+    n_categories: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Partial counts for one chunk of placements. Runs in worker processes, so it must stay top-level."""
+    n_groups = int(group_codes[-1]) + 1 if len(group_codes) else 0
+    cooccurrence = _cooccurrence_counts(group_codes, card_codes, n_groups, n_cards)
+    assignments = _category_assignment_counts(card_codes[with_id], category_codes[with_id], n_cards, n_categories)
+    return cooccurrence, assignments
+
+
+def selection_fingerprint(responses: List[Dict[str, Any]]) -> str:
+    """
+    Stable fingerprint of a selection of responses.
+
+    Depends only on the set of response IDs and their versions (submission or completion
+    timestamp), not on the order of the selection, so it is stable across reruns.
+
+    Args:
+        responses: List of response dictionaries from the dashboard.
+
+    Returns:
+        Hex digest identifying the selection.
+    """
+    entries = sorted(f"{response.get('id')}|{_response_version(response)}" for response in responses)
+    return hashlib.sha1("\n".join(entries).encode('utf-8')).hexdigest()
+
+
+def _response_version(response: Dict[str, Any]) -> Any:
+    """Timestamp that changes whenever a response's content does."""
+    response_data = response.get('response_data')
+    completed_at = response_data.get('completed_at') if isinstance(response_data, dict) else None
+    return response.get('submitted_at') or completed_at
+
+
+def encode_groupings(all_groups: List[List[str]], vocabulary: CardVocabulary) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Encode a flat list of card groupings as two parallel int arrays.
+
+    Args:
+        all_groups: A list of card groups. Each group is a list of card IDs (strings).
+        vocabulary: Vocabulary used to intern the card names.
+
+    Returns:
+        Tuple of (group_codes, card_codes) where, for every card placement,
+        group_codes holds the position of its group in all_groups and card_codes its card id.
+    """
+    group_sizes = [len(group) for group in all_groups]
+    flat_cards = [card for group in all_groups for card in group]
+
+    group_codes = np.repeat(np.arange(len(all_groups), dtype=np.intp), group_sizes)
+    card_codes = vocabulary.encode_cards(flat_cards)
+    return group_codes, card_codes
+
+
+def build_incidence_matrix(all_groups: List[List[str]]) -> Tuple[sparse.csr_matrix, List[str]]:
+    """
+    Build a sparse group x card incidence matrix from a flat list of card groupings.
+
+    Entry (g, c) holds how many times card c appears in group g. Repeated cards inside
+    a group are kept as counts so they contribute the same pairs as a pairwise walk.
+
+    Args:
+        all_groups: A list of card groups. Each group is a list of card IDs (strings).
+
+    Returns:
+        Tuple of (incidence, unique_cards) where:
+        - incidence: CSR matrix of shape (len(all_groups), len(unique_cards)).
+        - unique_cards: Sorted list of all unique cards, matching the matrix columns.
+    """
+    vocabulary = CardVocabulary()
+    group_codes, card_codes = encode_groupings(all_groups, vocabulary)
+    incidence = _incidence_matrix(group_codes, card_codes, len(all_groups), vocabulary.n_cards)
+
+    order = vocabulary.sorted_card_ids()
+    return incidence[:, order], vocabulary.card_names(order)
+
+
 def build_cooccurrence_matrix(all_groups: List[List[str]]) -> Tuple[pd.DataFrame, List[str]]:
     """
     Build a co-occurrence matrix from a flat list of card groupings.
     
-    Cards that appear together in the same group are counted.
+    Cards that appear together in the same group are counted. All counts come from a
+    single sparse product of the group x card incidence matrix with itself.
     
     Args:
         all_groups: A list of card groups. Each group is a list of card IDs (strings).
@@ -95,98 +519,260 @@ def build_cooccurrence_matrix(all_groups: List[List[str]]) -> Tuple[pd.DataFrame
         - cooccurrence_df: DataFrame with co-occurrence counts (cards x cards).
         - unique_cards: Sorted list of all unique cards found.
     """
-    # Collect all unique cards from all groups
-    unique_cards = set()
-    for group in all_groups:
-        for card in group:
-            unique_cards.add(str(card))
-    
-    unique_cards = sorted(list(unique_cards))
-    
-    # Initialize an empty co-occurrence matrix
-    cooccurrence = pd.DataFrame(0, index=unique_cards, columns=unique_cards)
-    
-    # Populate the matrix with co-occurrence counts
-    for group in all_groups:
-        # Increment count for each pair of cards within the group
-        for i, card1 in enumerate(group):
-            for card2 in group[i:]: # Start from current position to avoid double counting
-                if card1 == card2:
-                    continue  # Do not count a card co-occurring with itself
-                
-                # Symmetrically increment the count for the pair
-                cooccurrence.loc[card1, card2] += 1
-                cooccurrence.loc[card2, card1] += 1
-    
-    return cooccurrence, unique_cards
+    vocabulary = CardVocabulary()
+    group_codes, card_codes = encode_groupings(all_groups, vocabulary)
+    counts = _cooccurrence_counts(group_codes, card_codes, len(all_groups), vocabulary.n_cards)
+    return _label_card_matrix(counts, vocabulary)
+
+
+def _incidence_matrix(group_codes: np.ndarray, card_codes: np.ndarray, n_groups: int, n_cards: int) -> sparse.csr_matrix:
+    """Group x card incidence counts, in vocabulary id order."""
+    # Duplicate (group, card) entries are summed when converting to CSR
+    return sparse.csr_matrix(
+        (np.ones(len(card_codes), dtype=np.int64), (group_codes, card_codes)),
+        shape=(n_groups, n_cards),
+    )
 
 
-def build_similarity_matrix(cooccurrence: pd.DataFrame) -> pd.DataFrame:
+def _cooccurrence_counts(group_codes: np.ndarray, card_codes: np.ndarray, n_groups: int, n_cards: int) -> np.ndarray:
+    """Card x card co-occurrence counts, in vocabulary id order."""
+    incidence = _incidence_matrix(group_codes, card_codes, n_groups, n_cards)
+
+    # (cards x groups) @ (groups x cards) counts, for every card pair, the groups holding both
+    counts = (incidence.T @ incidence).toarray()
+
+    # Do not count a card co-occurring with itself
+    np.fill_diagonal(counts, 0)
+    return counts
+
+
+def _label_card_matrix(
+    counts: np.ndarray,
+    vocabulary: CardVocabulary,
+    ids: Optional[np.ndarray] = None,
+    condensed: bool = False
+) -> Tuple[Union[pd.DataFrame, SymmetricMatrix], List[str]]:
+    """Attach sorted card labels to a square card x card count matrix indexed by card id."""
+    order = vocabulary.sorted_card_ids(ids)
+    unique_cards = vocabulary.card_names(order)
+
+    labelled = counts[np.ix_(order, order)]
+    if condensed:
+        # The diagonal is not stored; a card never co-occurs with itself
+        return SymmetricMatrix.from_square(labelled, unique_cards, diagonal=0), unique_cards
+
+    # A card never co-occurs with itself
+    np.fill_diagonal(labelled, 0)
+    return pd.DataFrame(labelled, index=unique_cards, columns=unique_cards), unique_cards
+
+
+def build_similarity_matrix(
+    cooccurrence: Union[pd.DataFrame, SymmetricMatrix],
+    dtype: Any = np.float64
+) -> Union[pd.DataFrame, SymmetricMatrix]:
     """
     Build a normalized similarity matrix from co-occurrence counts.
     
-    Uses Jaccard similarity based on co-occurrence patterns.
+    Uses Jaccard similarity based on co-occurrence patterns. Row sums are computed once
+    and the whole matrix is produced with array operations.
     
     Args:
-        cooccurrence: Co-occurrence matrix (cards x cards)
+        cooccurrence: Co-occurrence matrix (cards x cards), as a DataFrame or a SymmetricMatrix
+        dtype: Floating point dtype of the result. Use np.float32 to halve memory on large decks.
         
     Returns:
-        Similarity matrix (cards x cards) with values between 0 and 1
+        Similarity matrix (cards x cards) with values between 0 and 1, of the same type as the input
     """
-    # Create a copy to avoid modifying the original
-    similarity = cooccurrence.copy().astype(float)
-    
+    if isinstance(cooccurrence, SymmetricMatrix):
+        return _condensed_similarity(cooccurrence, dtype)
+
+    counts = cooccurrence.to_numpy(dtype=dtype)
+
+    # Total co-occurrences per card, computed once for every pair
+    row_sums = counts.sum(axis=1)
+
     # Calculate Jaccard similarity: intersection / union
-    cards = cooccurrence.index.tolist()
-    n = len(cards)
-    
-    for i in range(n):
-        for j in range(i, n):
-            card1, card2 = cards[i], cards[j]
-            
-            intersection = cooccurrence.loc[card1, card2]
-            union = (cooccurrence.loc[card1].sum() + cooccurrence.loc[card2].sum() - 
-                    cooccurrence.loc[card1, card2])
-            
-            if union > 0:
-                jaccard = intersection / union
-            else:
-                jaccard = 0.0
-            
-            similarity.loc[card1, card2] = jaccard
-            similarity.loc[card2, card1] = jaccard
-    
-    return similarity
+    union = row_sums[:, None] + row_sums[None, :]
+    union -= counts
+
+    # Pairs with an empty union keep a similarity of 0
+    values = np.zeros_like(counts)
+    np.divide(counts, union, out=values, where=union > 0)
 
+    return pd.DataFrame(values, index=cooccurrence.index, columns=cooccurrence.columns)
 
-def build_distance_matrix(similarity: pd.DataFrame) -> pd.DataFrame:
+
+def _condensed_similarity(cooccurrence: SymmetricMatrix, dtype: Any) -> SymmetricMatrix:
+    """Jaccard similarity computed row by row on the condensed upper triangle."""
+    row_sums = cooccurrence.row_sums().astype(dtype)
+    values = cooccurrence.values.astype(dtype)
+
+    for i, row_slice in cooccurrence.iter_row_slices():
+        segment = values[row_slice]
+        union = row_sums[i] + row_sums[i + 1:]
+        union -= segment
+        # Pairs with an empty union have zero co-occurrence and keep a similarity of 0
+        np.divide(segment, union, out=segment, where=union > 0)
+
+    return SymmetricMatrix(values, cooccurrence.labels, diagonal=0)
+
+
+def build_distance_matrix(similarity: Union[pd.DataFrame, SymmetricMatrix]) -> Union[pd.DataFrame, SymmetricMatrix]:
     """
     Build a distance matrix from similarity matrix.
     
     Distance = 1 - Similarity
     
     Args:
-        similarity: Similarity matrix (cards x cards)
+        similarity: Similarity matrix (cards x cards), as a DataFrame or a SymmetricMatrix
         
     Returns:
-        Distance matrix suitable for hierarchical clustering
+        Distance matrix suitable for hierarchical clustering. For a SymmetricMatrix this is a
+        lazy view over the similarity storage rather than a new matrix.
     """
+    if isinstance(similarity, SymmetricMatrix):
+        return similarity.transformed(complement)
     return 1 - similarity
 
 
+class AnalysisResult(MutableMapping):
+    """
+    Dict-compatible analysis result whose expensive entries are computed on first access.
+
+    Entries are either plain values or zero-argument factories registered with defer(). A
+    factory runs the first time its key is read and the value replaces it, so later reads are free. Entries that are never
+    read are never computed, e.g. similarity and distance when only the co-occurrence heatmap
+    is shown. Iterating items() or values() computes everything.
+
+    Listeners registered with add_compute_listener() are told whenever a pending entry is
+    computed, so holders such as AnalysisCache can account for the memory it now takes.
+    """
+
+    def __init__(self, values: Optional[Dict[str, Any]] = None):
+        self._values: Dict[str, Any] = dict(values or {})
+        self._factories: Dict[str, Callable[[], Any]] = {}
+        self._order: List[str] = list(self._values)
+        self._listeners: List[Callable[[str], None]] = []
+
+    def defer(self, key: str, factory: Callable[[], Any]) -> None:
+        """Register a zero-argument factory that computes the entry for key on first access."""
+        self._values.pop(key, None)
+        if key not in self._order:
+            self._order.append(key)
+        self._factories[key] = factory
+
+    def __getitem__(self, key: str) -> Any:
+        if key in self._values:
+            return self._values[key]
+        if key not in self._factories:
+            raise KeyError(key)
+        # The factory is only dropped once its value is stored, so a failing one can be retried
+        value = self._factories[key]()
+        self._values[key] = value
+        self._factories.pop(key, None)
+        for listener in list(self._listeners):
+            listener(key)
+        return value
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        self._factories.pop(key, None)
+        if key not in self._values and key not in self._order:
+            self._order.append(key)
+        self._values[key] = value
+
+    def __delitem__(self, key: str) -> None:
+        if key not in self._values and key not in self._factories:
+            raise KeyError(key)
+        self._values.pop(key, None)
+        self._factories.pop(key, None)
+        self._order.remove(key)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(list(self._order))
+
+    def __len__(self) -> int:
+        return len(self._order)
+
+    def __repr__(self) -> str:
+        pending = ', '.join(key for key in self._order if key in self._factories)
+        return f"AnalysisResult(keys={self._order}, pending=[{pending}])"
+
+    def is_computed(self, key: str) -> bool:
+        """Whether the entry for key has been computed (or was never lazy)."""
+        return key in self._values
+
+    def computed_values(self) -> Dict[str, Any]:
+        """Entries computed so far, without computing any pending ones."""
+        return {key: self._values[key] for key in self._order if key in self._values}
+
+    def has_pending(self) -> bool:
+        """Whether some entries have not been computed yet."""
+        return bool(self._factories)
+
+    def pending_inputs(self) -> List[Any]:
+        """Objects kept alive by the factories of pending entries, e.g. parsed response columns."""
+        inputs = []
+        for factory in self._factories.values():
+            owner = getattr(factory, '__self__', None)
+            if owner is not None:
+                inputs.append(owner)
+            inputs.extend(cell.cell_contents for cell in getattr(factory, '__closure__', None) or ())
+        return inputs
+
+    def add_compute_listener(self, listener: Callable[[str], None]) -> None:
+        """Call listener(key) each time a pending entry is computed."""
+        self._listeners.append(listener)
+
+    def remove_compute_listener(self, listener: Callable[[str], None]) -> None:
+        """Stop calling a listener registered with add_compute_listener."""
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+
+def _empty_card_analysis() -> AnalysisResult:
+    return AnalysisResult({
+        'groupings': [],
+        'response_ids': [],
+        'cooccurrence': None,
+        'similarity': None,
+        'distance': None,
+        'unique_cards': [],
+        'metadata': []
+    })
+
+
+def _matrix_labels(matrix: Union[pd.DataFrame, SymmetricMatrix]) -> List[str]:
+    return list(matrix.labels) if isinstance(matrix, SymmetricMatrix) else list(matrix.index)
+
+
 def build_analysis_dataframe(
     responses: List[Dict[str, Any]],
-    include_metadata: bool = True
-) -> Dict[str, Any]:
+    include_metadata: bool = True,
+    accumulator: Optional['CooccurrenceAccumulator'] = None,
+    columns: Optional[ResponseColumns] = None,
+    parallel: Optional[bool] = None,
+    condensed: bool = False
+) -> AnalysisResult:
     """
     Build a comprehensive analysis dataframe and matrices from selected responses.
     
+    The result is computed lazily: co-occurrence, similarity, distance, groupings and metadata
+    are only built when first read, and then kept.
+    
     Args:
         responses: List of response dictionaries from dashboard
         include_metadata: Whether to include response metadata in output
+        accumulator: Optional CooccurrenceAccumulator already holding exactly `responses`.
+            When given, co-occurrence counts are read from it instead of being rebuilt.
+        columns: Optional result of extract_response_columns(responses), so the responses
+            are parsed once when several analyses run on the same selection.
+        parallel: Count in a process pool. Defaults to on for at least
+            PARALLEL_RESPONSE_THRESHOLD responses; results match the serial path.
+        condensed: Return the three card x card matrices as SymmetricMatrix objects that only
+            store the upper triangle, with distance as a lazy view of similarity.
         
     Returns:
-        Dictionary containing:
+        AnalysisResult (a dict-like mapping) containing:
         - 'groupings': Raw card groupings per response
         - 'response_ids': Response IDs corresponding to groupings
         - 'cooccurrence': Co-occurrence matrix
@@ -195,83 +781,264 @@ def build_analysis_dataframe(
         - 'unique_cards': List of unique cards
         - 'metadata': Response metadata if include_metadata=True
     """
-    groupings, response_ids = extract_sorted_cards_from_responses(responses)
+    columns = columns if columns is not None else extract_response_columns(responses)
     
-    if not groupings:
-        return {
-            'groupings': [],
-            'response_ids': [],
-            'cooccurrence': None,
-            'similarity': None,
-            'distance': None,
-            'unique_cards': [],
-            'metadata': []
-        }
+    if columns.card_codes.size == 0:
+        return _empty_card_analysis()
     
-    cooccurrence, unique_cards = build_cooccurrence_matrix(groupings)
-    similarity = build_similarity_matrix(cooccurrence)
-    distance = build_distance_matrix(similarity)
-    
-    metadata = []
-    if include_metadata:
-        # Filter responses to only include those that were processed
-        processed_responses = [r for r in responses if r.get('id') in response_ids]
-        for response in processed_responses:
-            metadata.append({
-                'response_id': response.get('id'),
-                'survey_id': response.get('survey_id'),
-                'completed_at': response.get('response_data', {}).get('completed_at'),
-            })
-    
-    return {
-        'groupings': groupings,
-        'response_ids': response_ids,
-        'cooccurrence': cooccurrence,
-        'similarity': similarity,
-        'distance': distance,
-        'unique_cards': unique_cards,
-        'metadata': metadata
+    # Responses that contributed at least one group
+    processed = columns.has_cards() & columns.has_id()
+    response_ids = [columns.response_ids[i] for i in np.flatnonzero(processed)]
+
+    values: Dict[str, Any] = {'response_ids': response_ids}
+    if accumulator is not None:
+        # The accumulator keeps changing with the selection, so its counts are read now
+        values['cooccurrence'] = accumulator.cooccurrence_matrix(condensed=condensed)[0]
+
+    def _cooccurrence() -> Union[pd.DataFrame, SymmetricMatrix]:
+        counts = columns.counts(parallel)['cooccurrence']
+        return _label_card_matrix(counts, columns.vocabulary, np.unique(columns.card_codes), condensed)[0]
+
+    return _lazy_card_analysis(
+        values,
+        {
+            'groupings': columns.groupings,
+            'cooccurrence': _cooccurrence,
+            'metadata': (lambda: columns.metadata(processed)) if include_metadata else list,
+        }
+    )
+
+
+def _lazy_card_analysis(values: Dict[str, Any], factories: Dict[str, Callable[[], Any]]) -> AnalysisResult:
+    """Card analysis result whose similarity, distance and labels derive from 'cooccurrence' on demand."""
+    derived = {
+        'similarity': lambda: build_similarity_matrix(result['cooccurrence']),
+        'distance': lambda: build_distance_matrix(result['similarity']),
+        'unique_cards': lambda: _matrix_labels(result['cooccurrence']),
     }
+    derived.update(factories)
+
+    result = AnalysisResult()
+    # Keep the key order of the eager result dict
+    for key in ('groupings', 'response_ids', 'cooccurrence', 'similarity', 'distance', 'unique_cards', 'metadata'):
+        if key in values:
+            result[key] = values[key]
+        else:
+            result.defer(key, derived[key])
+    return result
+
+
+def _pair_counts(all_groups: List[List[str]]) -> Tuple[np.ndarray, np.ndarray, List[str]]:
+    """
+    Count how often every card pair was grouped together, keyed by int-encoded pairs.
+
+    Cards are ranked by name and each pair is encoded as lo * n_cards + hi, so sorting the
+    keys orders pairs by (card1, card2). A card repeated m times in one group pairs with
+    itself m * (m - 1) / 2 times, as in a pairwise walk of the group.
+
+    Returns:
+        Tuple of (keys, counts, unique_cards). Keys are not sorted, so callers that only need
+        a few pairs can select them without sorting every pair.
+    """
+    vocabulary = CardVocabulary()
+    group_codes, card_codes = encode_groupings(all_groups, vocabulary)
+    order = vocabulary.sorted_card_ids()
+    n_cards = len(order)
+
+    rank = np.empty(n_cards, dtype=np.intp)
+    rank[order] = np.arange(n_cards, dtype=np.intp)
+    incidence = _incidence_matrix(group_codes, rank[card_codes], len(all_groups), n_cards)
+
+    # One sparse product counts every pair of distinct cards; keep the upper triangle (lo < hi)
+    together = sparse.triu(incidence.T @ incidence, k=1).tocoo()
+    placements = incidence.tocoo()
+    self_counts = np.bincount(
+        placements.col,
+        weights=placements.data * (placements.data - 1) // 2,
+        minlength=n_cards
+    ).astype(np.int64)
+    repeated = np.flatnonzero(self_counts)
+
+    keys = np.concatenate([
+        together.row.astype(np.int64) * n_cards + together.col,
+        repeated.astype(np.int64) * (n_cards + 1),
+    ])
+    counts = np.concatenate([together.data.astype(np.int64), self_counts[repeated]])
+
+    nonzero = counts > 0
+    return keys[nonzero], counts[nonzero], vocabulary.card_names(order)
+
+
+def decode_pair_keys(keys: np.ndarray, unique_cards: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Decode int pair keys (lo * n_cards + hi over ranks in unique_cards) into card names.
+
+    Args:
+        keys: Pair keys, as returned by build_response_pair_incidence.
+        unique_cards: Sorted card names the keys refer to.
+
+    Returns:
+        Tuple of (card1, card2) object arrays aligned with keys.
+    """
+    names = np.asarray(unique_cards, dtype=object)
+    n_cards = len(unique_cards)
+    return names[keys // n_cards], names[keys % n_cards]
+
+
+def _pairs_dataframe(keys: np.ndarray, counts: np.ndarray, unique_cards: List[str]) -> pd.DataFrame:
+    """Decode int pair keys into a card1, card2, together_count DataFrame."""
+    card1, card2 = decode_pair_keys(keys, unique_cards)
+    return pd.DataFrame({
+        'card1': card1,
+        'card2': card2,
+        'together_count': counts,
+    })
+
+
+def build_response_pair_incidence(columns: ResponseColumns) -> Tuple[sparse.csr_matrix, np.ndarray, List[str]]:
+    """
+    Build a sparse response x card-pair matrix of together counts.
+
+    Entry (r, p) holds how many times response r grouped the two cards of pair p together,
+    so its column sums are the co-occurrence counts. Only pairs of distinct cards that were
+    grouped together at least once get a column. Within-group pairs are generated with array
+    operations over the group x card incidence matrix.
+
+    Args:
+        columns: Result of extract_response_columns for the selection.
+
+    Returns:
+        Tuple of (pair_incidence, pair_keys, unique_cards) where:
+        - pair_incidence: CSR matrix of shape (columns.n_responses, len(pair_keys)).
+        - pair_keys: Sorted int pair keys, see decode_pair_keys.
+        - unique_cards: Sorted list of the cards in the selection.
+    """
+    vocabulary = columns.vocabulary
+    order = vocabulary.sorted_card_ids(np.unique(columns.card_codes))
+    n_cards = len(order)
+    unique_cards = vocabulary.card_names(order)
+
+    rank = np.full(vocabulary.n_cards, -1, dtype=np.intp)
+    rank[order] = np.arange(n_cards, dtype=np.intp)
+    groups = _incidence_matrix(columns.group_codes, rank[columns.card_codes], columns.n_groups, n_cards)
+    groups.sum_duplicates()
+    groups.sort_indices()
+
+    # Entry e at position p of a row with s entries pairs with the s - p - 1 entries after it
+    row_sizes = np.diff(groups.indptr)
+    entry_rows = np.repeat(np.arange(len(row_sizes), dtype=np.intp), row_sizes)
+    n_after = groups.indptr[entry_rows + 1] - np.arange(groups.nnz) - 1
+    first = np.repeat(np.arange(groups.nnz, dtype=np.intp), n_after)
+    second = first + 1 + np.arange(len(first)) - np.repeat(np.cumsum(n_after) - n_after, n_after)
+
+    # Column indices are sorted within each row, so the first card of a pair has the lower rank
+    keys = groups.indices[first].astype(np.int64) * n_cards + groups.indices[second]
+    pair_keys, pair_columns = np.unique(keys, return_inverse=True)
+    pair_incidence = sparse.csr_matrix(
+        (groups.data[first] * groups.data[second], (columns.group_response[entry_rows[first]], pair_columns)),
+        shape=(columns.n_responses, len(pair_keys)),
+    )
+    return pair_incidence, pair_keys, unique_cards
 
 
 def flatten_groupings_to_pairs(all_groups: List[List[str]]) -> pd.DataFrame:
     """
     Convert a flat list of groupings to a dataframe of card pairs.
 
-    Each row represents a pair of cards that were grouped together.
+    Each row represents a pair of cards that were grouped together. Pairs are counted on
+    int-encoded pair keys in a single pass, without building one record per pair.
 
     Args:
         all_groups: A flat list of card groups from all responses.
 
     Returns:
-        DataFrame with columns: card1, card2, together_count.
+        DataFrame with columns: card1, card2, together_count, sorted by card1 then card2.
     """
-    pairs = []
+    keys, counts, unique_cards = _pair_counts(all_groups)
+
+    if len(keys) == 0:
+        return pd.DataFrame(columns=['card1', 'card2', 'together_count'])
+
+    key_order = np.argsort(keys)
+    return _pairs_dataframe(keys[key_order], counts[key_order], unique_cards)
+
+
+def top_card_pairs(all_groups: List[List[str]], k: int = 20) -> pd.DataFrame:
+    """
+    Return the k card pairs grouped together most often.
+
+    Uses partial selection on the unsorted pair counts, so only the k strongest pairs are
+    sorted. Ties are broken by (card1, card2). A card paired with itself (repeated within a group) is not reported.
 
-    for group in all_groups:
-        # Create pairs from the cards in the group
-        for i, card1 in enumerate(group):
-            for card2 in group[i+1:]: # Start from i+1 to avoid self-pairs and duplicates
-                pairs.append({
-                    'card1': min(str(card1), str(card2)),  # Normalize pair order
-                    'card2': max(str(card1), str(card2)),
-                })
+    Args:
+        all_groups: A flat list of card groups from all responses.
+        k: Number of pairs to return.
+
+    Returns:
+        DataFrame with columns card1, card2, together_count, strongest pair first.
+    """
+    keys, counts, unique_cards = _pair_counts(all_groups)
+    n_cards = len(unique_cards)
+    distinct = keys // n_cards != keys % n_cards if n_cards else np.zeros(0, dtype=bool)
+    keys, counts = keys[distinct], counts[distinct]
 
-    if not pairs:
+    if k <= 0 or len(keys) == 0:
         return pd.DataFrame(columns=['card1', 'card2', 'together_count'])
 
-    pairs_df = pd.DataFrame(pairs)
+    if k < len(counts):
+        # The k-th largest count; every pair above it is selected, ties at it fill the rest in key order
+        threshold = np.partition(counts, len(counts) - k)[len(counts) - k]
+        above = np.flatnonzero(counts > threshold)
+        ties = np.flatnonzero(counts == threshold)
+        n_ties = k - len(above)
+        if n_ties < len(ties):
+            # Keys are unsorted, so the ties with the smallest keys are selected partially too
+            ties = ties[np.argpartition(keys[ties], n_ties - 1)[:n_ties]]
+        selected = np.concatenate([above, ties])
+    else:
+        selected = np.arange(len(counts))
+
+    selected = selected[np.lexsort((keys[selected], -counts[selected]))]
+    return _pairs_dataframe(keys[selected], counts[selected], unique_cards)
+
+
+def encode_category_assignments(
+    category_assignments: Dict[str, Dict[str, List[str]]],
+    vocabulary: CardVocabulary
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Encode category assignments as flat parallel arrays of card and category ids.
+
+    Every category of every response is interned, including categories left empty.
+
+    Args:
+        category_assignments: Dictionary mapping response_id to {category_name: [card1, card2, ...]}
+        vocabulary: Vocabulary used to intern card and category names.
+
+    Returns:
+        Tuple of (card_codes, category_codes) with one entry per card placement.
+    """
+    categories = []
+    category_sizes = []
+    flat_cards = []
+    for response_data in category_assignments.values():
+        for category, cards in response_data.items():
+            cards = cards if isinstance(cards, list) else []
+            categories.append(category)
+            category_sizes.append(len(cards))
+            flat_cards.extend(cards)
 
-    # Count how many times each pair appeared together
-    if not pairs_df.empty:
-        pairs_df = pairs_df.groupby(['card1', 'card2']).size().reset_index(name='together_count')
+    category_codes = np.repeat(vocabulary.encode_categories(categories), category_sizes)
+    card_codes = vocabulary.encode_cards(flat_cards)
+    return card_codes, category_codes
 
-    return pairs_df
 
 def build_category_assignment_matrix(category_assignments: Dict[str, Dict[str, List[str]]]) -> Tuple[pd.DataFrame, List[str], List[str]]:
     """
     Build a category assignment matrix showing how many times each card was assigned to each category.
 
+    All placements are encoded as (card, category) id pairs and counted with a single bincount.
+
     Args:
         category_assignments: Dictionary mapping response_id to {category_name: [card1, card2, ...]}
 
@@ -281,30 +1048,36 @@ def build_category_assignment_matrix(category_assignments: Dict[str, Dict[str, L
         - unique_cards: Sorted list of all unique cards
         - unique_categories: Sorted list of all unique categories
     """
-    # Collect all unique cards and categories
-    unique_cards = set()
-    unique_categories = set()
-
-    for response_data in category_assignments.values():
-        for category, cards in response_data.items():
-            unique_categories.add(category)
-            for card in cards:
-                unique_cards.add(str(card))
-
-    unique_cards = sorted(list(unique_cards))
-    unique_categories = sorted(list(unique_categories))
-
-    # Initialize matrix with zeros
-    category_matrix = pd.DataFrame(0, index=unique_cards, columns=unique_categories)
-
-    # Populate the matrix
-    for response_data in category_assignments.values():
-        for category, cards in response_data.items():
-            for card in cards:
-                card_str = str(card)
-                if card_str in category_matrix.index and category in category_matrix.columns:
-                    category_matrix.loc[card_str, category] += 1
-
+    vocabulary = CardVocabulary()
+    card_codes, category_codes = encode_category_assignments(category_assignments, vocabulary)
+    counts = _category_assignment_counts(card_codes, category_codes, vocabulary.n_cards, vocabulary.n_categories)
+    return _label_category_matrix(counts, vocabulary)
+
+
+def _category_assignment_counts(card_codes: np.ndarray, category_codes: np.ndarray, n_cards: int, n_categories: int) -> np.ndarray:
+    """Card x category placement counts, in vocabulary id order."""
+    # One flat (card, category) cell index per placement, counted in a single pass
+    cells = card_codes * n_categories + category_codes
+    return np.bincount(cells, minlength=n_cards * n_categories).reshape(n_cards, n_categories)
+
+
+def _label_category_matrix(
+    counts: np.ndarray,
+    vocabulary: CardVocabulary,
+    card_ids: Optional[np.ndarray] = None,
+    category_ids: Optional[np.ndarray] = None
+) -> Tuple[pd.DataFrame, List[str], List[str]]:
+    """Attach sorted card and category labels to a card x category matrix indexed by id."""
+    card_order = vocabulary.sorted_card_ids(card_ids)
+    category_order = vocabulary.sorted_category_ids(category_ids)
+    unique_cards = vocabulary.card_names(card_order)
+    unique_categories = vocabulary.category_names(category_order)
+
+    category_matrix = pd.DataFrame(
+        counts[np.ix_(card_order, category_order)],
+        index=unique_cards,
+        columns=unique_categories,
+    )
     return category_matrix, unique_cards, unique_categories
 
 def build_category_consistency_matrix(category_matrix: pd.DataFrame) -> pd.DataFrame:
@@ -328,62 +1101,238 @@ def build_category_consistency_matrix(category_matrix: pd.DataFrame) -> pd.DataF
 
     return consistency_matrix
 
+# Share of a card's placements that categories_for_coverage must reach
+CARD_COVERAGE_SHARE = 0.8
+
+
+def build_card_agreement_metrics(category_matrix: pd.DataFrame, coverage: float = CARD_COVERAGE_SHARE) -> pd.DataFrame:
+    """
+    Per-card agreement statistics computed on the whole card x category matrix at once.
+
+    Args:
+        category_matrix: Category assignment matrix from build_category_assignment_matrix
+        coverage: Share of placements the categories_for_coverage column must reach.
+
+    Returns:
+        DataFrame indexed by card with columns:
+        - 'placements': Number of times the card was sorted
+        - 'top_category': Category the card was placed in most often (first in column order on ties)
+        - 'top_share': Share of the card's placements in its top category
+        - 'entropy': Shannon entropy (bits) of the card's category distribution; 0 means full agreement
+        - 'categories_for_coverage': Fewest categories that together hold `coverage` of the placements
+    """
+    counts = category_matrix.to_numpy(dtype=np.float64)
+    placements = counts.sum(axis=1)
+    has_placements = placements > 0
+
+    shares = np.zeros_like(counts)
+    np.divide(counts, placements[:, None], out=shares, where=has_placements[:, None])
+
+    log_shares = np.zeros_like(shares)
+    np.log2(shares, out=log_shares, where=shares > 0)
+    entropy = 0.0 - (shares * log_shares).sum(axis=1)
+
+    # Categories sorted by share, largest first; count how many are needed to reach coverage
+    cumulative = np.cumsum(-np.sort(-shares, axis=1), axis=1)
+    categories_for_coverage = (cumulative < coverage - 1e-12).sum(axis=1) + 1
+
+    n_categories = counts.shape[1]
+    top = counts.argmax(axis=1) if n_categories else np.zeros(len(counts), dtype=np.intp)
+    columns = np.asarray(category_matrix.columns, dtype=object)
+    return pd.DataFrame({
+        'placements': placements.astype(np.int64),
+        'top_category': np.where(has_placements, columns[top] if n_categories else None, None),
+        'top_share': shares.max(axis=1) if n_categories else np.zeros(len(counts)),
+        'entropy': entropy,
+        'categories_for_coverage': np.where(has_placements, categories_for_coverage, 0),
+    }, index=category_matrix.index)
+
+
+def build_category_agreement_scores(category_matrix: pd.DataFrame) -> pd.DataFrame:
+    """
+    Per-category agreement scores for closed sorts, computed on the whole matrix at once.
+
+    The agreement of a category is the placement-weighted share of its cards' placements that
+    went to it: 1 when every card placed in the category was always placed there.
+
+    Args:
+        category_matrix: Category assignment matrix from build_category_assignment_matrix
+
+    Returns:
+        DataFrame indexed by category with columns:
+        - 'placements': Number of cards placed in the category, over all responses
+        - 'cards_placed': Number of distinct cards placed in it at least once
+        - 'primary_cards': Number of cards whose top category it is
+        - 'agreement': Placement-weighted consistency of the cards placed in it (0-1)
+    """
+    counts = category_matrix.to_numpy(dtype=np.float64)
+    card_placements = counts.sum(axis=1, keepdims=True)
+    shares = np.zeros_like(counts)
+    np.divide(counts, card_placements, out=shares, where=card_placements > 0)
+
+    placements = counts.sum(axis=0)
+    agreement = np.zeros(counts.shape[1])
+    np.divide((counts * shares).sum(axis=0), placements, out=agreement, where=placements > 0)
+
+    primary = np.zeros(counts.shape[1], dtype=np.int64)
+    placed = card_placements[:, 0] > 0
+    if counts.shape[1] and placed.any():
+        primary = np.bincount(counts[placed].argmax(axis=1), minlength=counts.shape[1])
+
+    return pd.DataFrame({
+        'placements': placements.astype(np.int64),
+        'cards_placed': (counts > 0).sum(axis=0),
+        'primary_cards': primary,
+        'agreement': agreement,
+    }, index=category_matrix.columns)
+
+
 def build_category_popularity_analysis(category_assignments: Dict[str, Dict[str, List[str]]]) -> Dict[str, Any]:
     """
     Analyze category popularity and usage patterns.
 
+    Responses are walked once to collect one (category, size) entry per category used; all
+    statistics are then computed with array operations (see build_category_size_stats).
+
     Args:
         category_assignments: Dictionary mapping response_id to {category_name: [card1, card2, ...]}
 
     Returns:
         Dictionary containing:
+        - 'category_stats': DataFrame of per-category size statistics, see build_category_size_stats
         - 'category_counts': Count of cards per category across all responses
         - 'category_usage': Count of responses that used each category
         - 'average_cards_per_category': Average number of cards per category
-        - 'category_size_distribution': Distribution of category sizes
+        - 'category_size_distribution': Distribution of category sizes, in ascending order
     """
-    category_counts = {}
-    category_usage = {}
-
-    # Count cards per category and track which responses used each category
+    vocabulary = CardVocabulary()
+    categories = []
+    sizes = []
     for response_data in category_assignments.values():
         for category, cards in response_data.items():
-            # Count cards in this category
-            card_count = len(cards)
-            category_counts[category] = category_counts.get(category, 0) + card_count
+            categories.append(category)
+            sizes.append(len(cards))
+
+    category_ids = vocabulary.encode_categories(categories)
+    return _category_popularity(
+        vocabulary,
+        category_ids,
+        np.array(sizes, dtype=np.int64),
+        np.ones(len(category_ids), dtype=np.int64),
+        len(category_assignments)
+    )
+
+
+# Percentiles of category size reported by build_category_size_stats
+CATEGORY_SIZE_PERCENTILES = (25, 50, 75, 90)
+
+
+def build_category_size_stats(
+    category_names: List[str],
+    category_ids: np.ndarray,
+    sizes: np.ndarray,
+    counts: Optional[np.ndarray] = None,
+    percentiles: Sequence[int] = CATEGORY_SIZE_PERCENTILES
+) -> pd.DataFrame:
+    """
+    Columnar size statistics per category.
 
-            # Track category usage
-            category_usage[category] = category_usage.get(category, 0) + 1
+    Every statistic is derived from one category x size histogram built with a single 2-D
+    bincount, so the cost does not depend on how the sizes are stored per response.
+    Percentiles use linear interpolation, as np.percentile does.
 
-    # Calculate additional metrics
-    total_responses = len(category_assignments)
-    total_categories = len(category_counts)
+    Args:
+        category_names: Names indexed by category id.
+        category_ids: Category id of each observed category use (one per response using it).
+        sizes: Number of cards in each observed category use.
+        counts: Optional number of times each (category_id, size) entry was observed.
+        percentiles: Percentiles of category size to report, e.g. (25, 50, 75, 90).
 
-    average_cards_per_category = {
-        category: count / category_usage.get(category, 1)
-        for category, count in category_counts.items()
+    Returns:
+        DataFrame indexed by category name (sorted), with columns responses_using, total_cards,
+        mean_cards, min_cards, one p<q>_cards column per percentile, max_cards and
+        size_histogram (number of uses with 0, 1, 2, ... cards).
+    """
+    columns = (['responses_using', 'total_cards', 'mean_cards', 'min_cards']
+               + [f'p{q}_cards' for q in percentiles] + ['max_cards', 'size_histogram'])
+    counts = np.ones(len(category_ids), dtype=np.int64) if counts is None else np.asarray(counts, dtype=np.int64)
+    observed = counts > 0
+    if not observed.any():
+        return pd.DataFrame(columns=columns, index=pd.Index([], name='category'))
+
+    category_ids, sizes, counts = category_ids[observed], sizes[observed], counts[observed]
+    used, category_codes = np.unique(category_ids, return_inverse=True)
+    n_sizes = int(sizes.max()) + 1
+
+    # histogram[c, s] = number of times category c was used with s cards
+    histogram = np.bincount(
+        category_codes * n_sizes + sizes,
+        weights=counts,
+        minlength=len(used) * n_sizes
+    ).astype(np.int64).reshape(len(used), n_sizes)
+
+    size_values = np.arange(n_sizes)
+    usage = histogram.sum(axis=1)
+    totals = histogram @ size_values
+    cumulative = histogram.cumsum(axis=1)
+
+    def size_at_rank(rank: np.ndarray) -> np.ndarray:
+        # Size of the rank-th smallest use (0-based) of each category
+        return (cumulative <= rank[:, None]).sum(axis=1)
+
+    stats = {
+        'responses_using': usage,
+        'total_cards': totals,
+        'mean_cards': totals / usage,
+        'min_cards': size_at_rank(np.zeros(len(used), dtype=np.int64)),
     }
-
-    # Create distribution of category sizes
-    category_size_distribution = {}
-    for response_data in category_assignments.values():
-        for category, cards in response_data.items():
-            size = len(cards)
-            category_size_distribution[category] = category_size_distribution.get(category, [])
-            category_size_distribution[category].append(size)
+    for q in percentiles:
+        position = q / 100 * (usage - 1)
+        lower = np.floor(position).astype(np.int64)
+        lower_size = size_at_rank(lower)
+        upper_size = size_at_rank(np.minimum(lower + 1, usage - 1))
+        stats[f'p{q}_cards'] = lower_size + (position - lower) * (upper_size - lower_size)
+    stats['max_cards'] = size_at_rank(usage - 1)
+    stats['size_histogram'] = list(histogram)
+
+    names = [category_names[i] for i in used]
+    return pd.DataFrame(stats, index=pd.Index(names, name='category'), columns=columns).sort_index()
+
+
+def _category_popularity(
+    vocabulary: CardVocabulary,
+    category_ids: np.ndarray,
+    sizes: np.ndarray,
+    counts: np.ndarray,
+    total_responses: int
+) -> Dict[str, Any]:
+    """Popularity result from (category, size, count) entries, with the legacy dict keys derived from the stats table."""
+    stats = build_category_size_stats(vocabulary.category_labels, category_ids, sizes, counts)
+    size_values = np.arange(len(stats['size_histogram'].iloc[0])) if len(stats) else np.arange(0)
 
     return {
-        'category_counts': category_counts,
-        'category_usage': category_usage,
-        'average_cards_per_category': average_cards_per_category,
-        'category_size_distribution': category_size_distribution,
+        'category_stats': stats,
+        'category_counts': {category: int(total) for category, total in stats['total_cards'].items()},
+        'category_usage': {category: int(usage) for category, usage in stats['responses_using'].items()},
+        'average_cards_per_category': {category: float(mean) for category, mean in stats['mean_cards'].items()},
+        'category_size_distribution': {
+            category: np.repeat(size_values, histogram).tolist()
+            for category, histogram in stats['size_histogram'].items()
+        },
         'total_responses': total_responses,
-        'total_categories': total_categories
+        'total_categories': len(stats)
     }
 
+
 def build_comprehensive_category_analysis(
     responses: List[Dict[str, Any]],
-    include_metadata: bool = True
+    include_metadata: bool = True,
+    accumulator: Optional['CooccurrenceAccumulator'] = None,
+    columns: Optional[ResponseColumns] = None,
+    parallel: Optional[bool] = None,
+    normalize_categories: bool = False,
+    merge_threshold: Optional[float] = DEFAULT_MERGE_THRESHOLD,
+    category_mapping: Optional[Dict[str, str]] = None
 ) -> Dict[str, Any]:
     """
     Build a comprehensive category-level analysis for closed card sortings.
@@ -391,19 +1340,36 @@ def build_comprehensive_category_analysis(
     Args:
         responses: List of response dictionaries from dashboard
         include_metadata: Whether to include response metadata in output
+        accumulator: Optional CooccurrenceAccumulator already holding exactly `responses`.
+            When given, category counts are read from it instead of being rebuilt.
+        columns: Optional result of extract_response_columns(responses), so the responses
+            are parsed once when several analyses run on the same selection.
+        parallel: Count in a process pool. Defaults to on for at least
+            PARALLEL_RESPONSE_THRESHOLD responses; results match the serial path.
+        normalize_categories: Merge category names that differ in case, whitespace, word
+            endings or spelling (see category_normalization.propose_category_merges) before
+            counting. Useful for open sorts.
+        merge_threshold: Trigram similarity needed for a spelling merge, or None to only fold
+            case, whitespace and word endings. Used with normalize_categories.
+        category_mapping: Explicit category renames to apply before counting. Takes precedence
+            over normalize_categories.
 
     Returns:
         Dictionary containing:
-        - 'category_assignments': Raw category assignments per response
+        - 'category_assignments': Category assignments per response, after renaming
         - 'response_ids': Response IDs that were processed
         - 'category_matrix': Category assignment matrix (cards x categories)
         - 'consistency_matrix': Category consistency matrix (normalized)
         - 'category_popularity': Category popularity analysis
+        - 'card_agreement': Per-card agreement metrics, see build_card_agreement_metrics
+        - 'category_agreement': Per-category agreement scores, see build_category_agreement_scores
         - 'unique_cards': List of unique cards
         - 'unique_categories': List of unique categories
+        - 'category_mapping': Category renames that were applied
         - 'metadata': Response metadata if include_metadata=True
     """
-    category_assignments, response_ids = extract_category_assignments_from_responses(responses)
+    columns = columns if columns is not None else extract_response_columns(responses)
+    category_assignments = columns.category_assignments()
 
     if not category_assignments:
         return {
@@ -412,25 +1378,51 @@ def build_comprehensive_category_analysis(
             'category_matrix': None,
             'consistency_matrix': None,
             'category_popularity': None,
+            'card_agreement': None,
+            'category_agreement': None,
             'unique_cards': [],
             'unique_categories': [],
+            'category_mapping': {},
             'metadata': []
         }
 
-    category_matrix, unique_cards, unique_categories = build_category_assignment_matrix(category_assignments)
+    # Category analysis only covers responses that can be identified
+    processed = columns.has_id()
+    response_ids = list(category_assignments.keys())
+
+    if category_mapping is None and normalize_categories:
+        category_mapping = _propose_column_merges(columns, processed, merge_threshold)
+
+    if category_mapping:
+        # Renamed categories are counted from the placement arrays; the accumulator only
+        # holds counts per original name
+        category_assignments = apply_category_mapping(category_assignments, category_mapping)
+        category_matrix, unique_cards, unique_categories = _renamed_category_matrix(columns, processed, category_mapping)
+        category_popularity = build_category_popularity_analysis(category_assignments)
+    elif accumulator is not None:
+        category_matrix, unique_cards, unique_categories = accumulator.category_assignment_matrix()
+        category_popularity = accumulator.category_popularity()
+    else:
+        counts = columns.counts(parallel)['assignments']
+        category_matrix, unique_cards, unique_categories = _label_category_matrix(
+            counts,
+            columns.vocabulary,
+            np.unique(columns.card_codes[processed[columns.response_codes]]),
+            np.unique(columns.group_category[processed[columns.group_response]]),
+        )
+        groups = processed[columns.group_response]
+        category_popularity = _category_popularity(
+            columns.vocabulary,
+            columns.group_category[groups],
+            columns.group_sizes[groups],
+            np.ones(int(groups.sum()), dtype=np.int64),
+            len(category_assignments)
+        )
     consistency_matrix = build_category_consistency_matrix(category_matrix)
-    category_popularity = build_category_popularity_analysis(category_assignments)
+    card_agreement = build_card_agreement_metrics(category_matrix)
+    category_agreement = build_category_agreement_scores(category_matrix)
 
-    metadata = []
-    if include_metadata:
-        # Filter responses to only include those that were processed
-        processed_responses = [r for r in responses if r.get('id') in response_ids]
-        for response in processed_responses:
-            metadata.append({
-                'response_id': response.get('id'),
-                'survey_id': response.get('survey_id'),
-                'completed_at': response.get('response_data', {}).get('completed_at'),
-            })
+    metadata = columns.metadata(processed) if include_metadata else []
 
     return {
         'category_assignments': category_assignments,
@@ -438,7 +1430,335 @@ def build_comprehensive_category_analysis(
         'category_matrix': category_matrix,
         'consistency_matrix': consistency_matrix,
         'category_popularity': category_popularity,
+        'card_agreement': card_agreement,
+        'category_agreement': category_agreement,
         'unique_cards': unique_cards,
         'unique_categories': unique_categories,
+        'category_mapping': category_mapping or {},
         'metadata': metadata
     }
+
+
+def _propose_column_merges(columns: ResponseColumns, processed: np.ndarray, threshold: Optional[float]) -> Dict[str, str]:
+    """Category merges for the identified responses, naming merged groups by their most used name."""
+    vocabulary = columns.vocabulary
+    usage = np.bincount(columns.group_category[processed[columns.group_response]], minlength=vocabulary.n_categories)
+    used = np.flatnonzero(usage)
+    names = vocabulary.category_names(used)
+    return propose_category_merges(names, dict(zip(names, usage[used].tolist())), threshold)
+
+
+def _renamed_category_matrix(
+    columns: ResponseColumns,
+    processed: np.ndarray,
+    category_mapping: Dict[str, str]
+) -> Tuple[pd.DataFrame, List[str], List[str]]:
+    """Card x category matrix with categories renamed before counting."""
+    vocabulary = columns.vocabulary
+    original_names = list(vocabulary.category_labels)
+    # Old category id -> id of its new name (new names are interned if unseen)
+    renamed_ids = vocabulary.encode_categories([category_mapping.get(name, name) for name in original_names])
+
+    placements = processed[columns.response_codes]
+    card_codes = columns.card_codes[placements]
+    category_codes = renamed_ids[columns.category_codes[placements]]
+    counts = _category_assignment_counts(card_codes, category_codes, vocabulary.n_cards, vocabulary.n_categories)
+    return _label_category_matrix(
+        counts,
+        vocabulary,
+        np.unique(card_codes),
+        np.unique(renamed_ids[columns.group_category[processed[columns.group_response]]]),
+    )
+
+
+def accumulate_responses(
+    responses: Iterable[Any],
+    include_metadata: bool = True,
+    batch_size: int = STREAMING_BATCH_SIZE
+) -> Tuple['CooccurrenceAccumulator', List[Dict[str, Any]]]:
+    """
+    Fold a stream of responses into a CooccurrenceAccumulator, one batch at a time.
+
+    Only batch_size responses are held at once; their payload is released as soon as the
+    batch has been counted, so peak memory depends on deck size rather than participant count.
+
+    Args:
+        responses: Iterable or generator of response dictionaries. Items may also be lists of
+            responses, such as pages fetched from the backend.
+        include_metadata: Whether to collect metadata rows for the counted responses.
+        batch_size: Number of responses counted together.
+
+    Returns:
+        Tuple of (accumulator, metadata).
+    """
+    accumulator = CooccurrenceAccumulator()
+    metadata = []
+
+    for batch in _iter_batches(responses, batch_size):
+        counted = set(accumulator.add_many(batch))
+        if include_metadata:
+            for response in batch:
+                response_id = response.get('id')
+                if response_id in counted:
+                    counted.discard(response_id)
+                    metadata.append({
+                        'response_id': response_id,
+                        'survey_id': response.get('survey_id'),
+                        'completed_at': response.get('response_data', {}).get('completed_at'),
+                    })
+
+    return accumulator, metadata
+
+
+def build_analysis_dataframe_streaming(
+    responses: Iterable[Any],
+    include_metadata: bool = True,
+    batch_size: int = STREAMING_BATCH_SIZE,
+    condensed: bool = False
+) -> AnalysisResult:
+    """
+    Streaming variant of build_analysis_dataframe for iterables and paged sources.
+
+    Responses are counted in batches and then dropped, so raw groupings are not kept and
+    'groupings' is None in the result. Responses without an 'id' are skipped. Counting happens
+    up front; similarity and distance are computed on first access.
+
+    Args:
+        responses: Iterable or generator of response dictionaries, or of pages (lists) of them.
+        include_metadata: Whether to include response metadata in output
+        batch_size: Number of responses counted together.
+        condensed: Return SymmetricMatrix objects, as in build_analysis_dataframe.
+
+    Returns:
+        AnalysisResult with the same keys as build_analysis_dataframe.
+    """
+    accumulator, metadata = accumulate_responses(responses, include_metadata, batch_size)
+    cooccurrence, unique_cards = accumulator.cooccurrence_matrix(condensed=condensed)
+
+    if not unique_cards:
+        return _empty_card_analysis()
+
+    return _lazy_card_analysis(
+        {
+            'groupings': None,
+            'response_ids': sorted(accumulator.response_ids, key=str),
+            'cooccurrence': cooccurrence,
+            'unique_cards': unique_cards,
+            'metadata': metadata
+        },
+        {}
+    )
+
+
+def _iter_batches(responses: Iterable[Any], batch_size: int) -> Iterator[List[Dict[str, Any]]]:
+    """Regroup a stream of responses (or pages of responses) into lists of up to batch_size."""
+    batch = []
+    for item in responses:
+        if isinstance(item, list):
+            batch.extend(item)
+        else:
+            batch.append(item)
+        while len(batch) >= batch_size:
+            yield batch[:batch_size]
+            batch = batch[batch_size:]
+    if batch:
+        yield batch
+
+
+class CooccurrenceAccumulator:
+    """
+    Running co-occurrence, category assignment and category popularity counts.
+
+    Responses are added or removed one at a time, and each call only touches the cards and
+    categories of that response, so toggling a single response in a large selection does not
+    rebuild any matrix. Responses are tracked by their 'id': responses without one are ignored
+    and adding a response that is already counted does nothing.
+
+    The matrices returned by the accessor methods match build_cooccurrence_matrix,
+    build_category_assignment_matrix and build_category_popularity_analysis for the same responses.
+    """
+
+    def __init__(self, initial_capacity: int = 64):
+        self._response_ids = set()
+
+        # Card and category labels are interned to stable row/column positions
+        self.vocabulary = CardVocabulary()
+
+        card_capacity = max(initial_capacity, 1)
+        category_capacity = max(initial_capacity // 4, 1)
+        self._cooccurrence = np.zeros((card_capacity, card_capacity), dtype=np.int64)
+        self._group_card_counts = np.zeros(card_capacity, dtype=np.int64)
+        self._assignments = np.zeros((card_capacity, category_capacity), dtype=np.int64)
+        self._category_usage = np.zeros(category_capacity, dtype=np.int64)
+        # (category_id, category_size) -> number of responses with that category at that size
+        self._category_sizes = Counter()
+
+    @property
+    def response_ids(self) -> set:
+        """Set of response IDs currently counted."""
+        return set(self._response_ids)
+
+    def __len__(self) -> int:
+        return len(self._response_ids)
+
+    def __contains__(self, response_id: Any) -> bool:
+        return response_id in self._response_ids
+
+    def add(self, response: Dict[str, Any]) -> bool:
+        """
+        Add a response to the running counts.
+
+        Args:
+            response: Response dictionary from the dashboard.
+
+        Returns:
+            True if the response was counted, False if it was skipped.
+        """
+        response_id = response.get('id')
+        if not response_id or response_id in self._response_ids:
+            return False
+
+        sorted_cards = _get_sorted_cards(response)
+        if not sorted_cards:
+            return False
+
+        self._apply(sorted_cards, 1)
+        self._response_ids.add(response_id)
+        return True
+
+    def add_many(self, responses: Iterable[Dict[str, Any]], parallel: Optional[bool] = None) -> List[Any]:
+        """
+        Add a batch of responses, counting the whole batch with array operations.
+
+        Faster than calling add() per response when filling the accumulator. Responses that
+        are already counted, lack an 'id' or have no card data are skipped.
+
+        Args:
+            responses: Iterable of response dictionaries.
+            parallel: Count the batch in a process pool. Defaults to on for batches of at
+                least PARALLEL_RESPONSE_THRESHOLD new responses; results match the serial path.
+
+        Returns:
+            IDs of the responses that were counted, in input order.
+        """
+        batch = [
+            response for response in responses
+            if response.get('id') and response.get('id') not in self._response_ids
+        ]
+        columns = extract_response_columns(batch, self.vocabulary)
+        if columns.n_responses == 0:
+            return []
+        self._ensure_capacity()
+
+        n_cards, n_categories = self.vocabulary.n_cards, self.vocabulary.n_categories
+        counts = columns.counts(parallel)
+        self._cooccurrence[:n_cards, :n_cards] += counts['cooccurrence']
+        self._assignments[:n_cards, :n_categories] += counts['assignments']
+        self._group_card_counts[:n_cards] += np.bincount(columns.card_codes, minlength=n_cards)
+        self._category_usage[:n_categories] += np.bincount(columns.group_category, minlength=n_categories)
+
+        size_keys, size_counts = np.unique(
+            np.stack([columns.group_category, columns.group_sizes], axis=1), axis=0, return_counts=True
+        )
+        for (category_id, size), count in zip(size_keys.tolist(), size_counts.tolist()):
+            self._category_sizes[(category_id, size)] += count
+
+        self._response_ids.update(columns.response_ids)
+        return list(columns.response_ids)
+
+    def remove(self, response: Dict[str, Any]) -> bool:
+        """
+        Remove a previously added response from the running counts.
+
+        Args:
+            response: The same response dictionary that was passed to add().
+
+        Returns:
+            True if the response was removed, False if it was not counted.
+        """
+        response_id = response.get('id')
+        if response_id not in self._response_ids:
+            return False
+
+        self._apply(_get_sorted_cards(response), -1)
+        self._response_ids.discard(response_id)
+        return True
+
+    def cooccurrence_matrix(self, condensed: bool = False) -> Tuple[Union[pd.DataFrame, SymmetricMatrix], List[str]]:
+        """
+        Current co-occurrence counts, in the format of build_cooccurrence_matrix.
+
+        Args:
+            condensed: Return a SymmetricMatrix instead of a square DataFrame.
+
+        Returns:
+            Tuple of (cooccurrence, unique_cards).
+        """
+        n_cards = self.vocabulary.n_cards
+        cards = np.flatnonzero(self._group_card_counts[:n_cards] > 0)
+        return _label_card_matrix(self._cooccurrence, self.vocabulary, cards, condensed)
+
+    def category_assignment_matrix(self) -> Tuple[pd.DataFrame, List[str], List[str]]:
+        """
+        Current card x category counts, in the format of build_category_assignment_matrix.
+
+        Returns:
+            Tuple of (category_matrix, unique_cards, unique_categories).
+        """
+        n_cards, n_categories = self.vocabulary.n_cards, self.vocabulary.n_categories
+        cards = np.flatnonzero(self._assignments[:n_cards, :n_categories].sum(axis=1) > 0)
+        categories = np.flatnonzero(self._category_usage[:n_categories] > 0)
+        return _label_category_matrix(self._assignments, self.vocabulary, cards, categories)
+
+    def category_popularity(self) -> Dict[str, Any]:
+        """
+        Current category usage statistics, in the format of build_category_popularity_analysis.
+
+        Categories are listed in sorted order and size distributions in ascending size order.
+        """
+        entries = [(category_id, size, count) for (category_id, size), count in self._category_sizes.items() if count > 0]
+        category_ids, sizes, counts = (np.array(values, dtype=np.int64) for values in zip(*entries)) if entries else (
+            np.zeros(0, dtype=np.int64) for _ in range(3)
+        )
+        return _category_popularity(self.vocabulary, category_ids, sizes, counts, len(self._response_ids))
+
+    def _apply(self, sorted_cards: Dict[str, List[str]], sign: int) -> None:
+        """Add (sign=1) or subtract (sign=-1) one response's contribution to every count."""
+        for category, cards in sorted_cards.items():
+            cards = cards if isinstance(cards, list) else []
+            category_id = self.vocabulary.category_id(category)
+            codes = self.vocabulary.encode_cards(cards)
+            # Grow before indexing so newly interned ids fit in the matrices
+            self._ensure_capacity()
+
+            self._category_usage[category_id] += sign
+            self._category_sizes[(category_id, len(cards))] += sign
+            if not cards:
+                continue
+
+            np.add.at(self._assignments[:, category_id], codes, sign)
+            np.add.at(self._group_card_counts, codes, sign)
+            # Every ordered pair in the group; the diagonal is dropped when reading the matrix
+            np.add.at(self._cooccurrence, (codes[:, None], codes[None, :]), sign)
+
+    def _ensure_capacity(self) -> None:
+        card_capacity, category_capacity = self._assignments.shape
+        if self.vocabulary.n_cards > card_capacity:
+            new_capacity = max(self.vocabulary.n_cards, 2 * card_capacity)
+            cooccurrence = np.zeros((new_capacity, new_capacity), dtype=np.int64)
+            cooccurrence[:card_capacity, :card_capacity] = self._cooccurrence
+            self._cooccurrence = cooccurrence
+            self._group_card_counts = np.concatenate([self._group_card_counts, np.zeros(new_capacity - card_capacity, dtype=np.int64)])
+            self._assignments = np.vstack([self._assignments, np.zeros((new_capacity - card_capacity, category_capacity), dtype=np.int64)])
+            card_capacity = new_capacity
+
+        if self.vocabulary.n_categories > category_capacity:
+            new_capacity = max(self.vocabulary.n_categories, 2 * category_capacity)
+            self._category_usage = np.concatenate([self._category_usage, np.zeros(new_capacity - category_capacity, dtype=np.int64)])
+            self._assignments = np.hstack([self._assignments, np.zeros((card_capacity, new_capacity - category_capacity), dtype=np.int64)])
+
+
+def _get_sorted_cards(response: Dict[str, Any]) -> Dict[str, List[str]]:
+    """Return the {category: [cards]} mapping of a response, or an empty dict."""
+    response_data = response.get('response_data', {})
+    return response_data.get('sorted_cards', {}) if isinstance(response_data, dict) else {}
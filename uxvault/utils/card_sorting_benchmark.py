@@ -0,0 +1,414 @@
+"""
+Benchmarks for the card sorting analysis functions.
+
+generate_study builds a seeded synthetic card sorting study (open, closed or hybrid) whose
+responses have the same shape as the ones stored by solve_card_sorting. run_benchmarks times
+the public analysis functions over a grid of study sizes and records their peak memory with
+tracemalloc. Runs are saved as JSON so later runs can be compared to catch regressions:
+
+    python -m uxvault.utils.card_sorting_benchmark run --output baseline.json
+    python -m uxvault.utils.card_sorting_benchmark run --output current.json
+    python -m uxvault.utils.card_sorting_benchmark compare baseline.json current.json
+"""
+
+import argparse
+import json
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from typing import List, Dict, Any, Optional, Callable, Sequence
+
+import numpy as np
+import pandas as pd
+
+from uxvault.utils.card_sorting_analysis import (
+    build_analysis_dataframe,
+    build_analysis_dataframe_streaming,
+    build_card_agreement_metrics,
+    build_category_agreement_scores,
+    build_category_assignment_matrix,
+    build_category_consistency_matrix,
+    build_category_popularity_analysis,
+    build_comprehensive_category_analysis,
+    build_cooccurrence_matrix,
+    build_distance_matrix,
+    build_similarity_matrix,
+    extract_category_assignments_from_responses,
+    extract_response_columns,
+    extract_sorted_cards_from_responses,
+    flatten_groupings_to_pairs,
+    top_card_pairs,
+)
+from uxvault.utils.card_sorting_agreement import build_participant_agreement
+from uxvault.utils.card_sorting_bootstrap import bootstrap_cooccurrence
+from uxvault.utils.card_sorting_clustering import build_card_clustering
+from uxvault.utils.card_sorting_neighbors import CardNeighborIndex
+
+
+# Card sorting types, as in the "allow_custom_categories" survey setting
+SORT_TYPES = ['Closed', 'Open', 'Hybrid']
+
+# Default size grid: every combination of card and participant counts is benchmarked
+DEFAULT_CARD_COUNTS = (30, 100, 300)
+DEFAULT_PARTICIPANT_COUNTS = (100, 1000, 5000)
+QUICK_CARD_COUNTS = (30, 100)
+QUICK_PARTICIPANT_COUNTS = (50, 500)
+DEFAULT_CATEGORY_COUNT = 8
+
+# Timed runs per function and size; the fastest and the median are reported
+DEFAULT_REPEATS = 3
+
+# A slowdown is only reported when it exceeds this share and this many seconds; a memory
+# increase when it exceeds this share and this many bytes
+DEFAULT_REGRESSION_THRESHOLD = 0.2
+MIN_REGRESSION_SECONDS = 0.005
+MIN_REGRESSION_BYTES = 1024 * 1024
+
+# Spelling variants participants of open sorts give the same category
+_OPEN_NAME_VARIANTS = ['{name}', '{lower}', '{name} ', '{upper}', '{name}s', 'My {lower}']
+
+
+def generate_study(
+    n_cards: int = 50,
+    n_participants: int = 100,
+    n_categories: int = DEFAULT_CATEGORY_COUNT,
+    sort_type: str = 'Closed',
+    seed: int = 0,
+    agreement: float = 0.7
+) -> Dict[str, Any]:
+    """
+    Generate a seeded synthetic card sorting study.
+
+    Every card belongs to a hidden topic. Each participant places a card in the category of
+    its topic with probability `agreement` and in a random category otherwise, so the data
+    has realistic structure for clustering and agreement metrics.
+
+    Args:
+        n_cards: Number of cards in the deck.
+        n_participants: Number of responses.
+        n_categories: Number of topics (and predefined categories for closed/hybrid sorts).
+        sort_type: 'Closed', 'Open' or 'Hybrid'. Open participants name their own categories,
+            with spelling variants; hybrid participants sometimes add a category of their own.
+        seed: Seed of the random generator.
+        agreement: Probability that a card is placed in its topic's category.
+
+    Returns:
+        Dictionary containing:
+        - 'survey_config': Survey configuration, as created by create_card_sorting
+        - 'responses': Response dictionaries, as loaded by the dashboard
+    """
+    if sort_type not in SORT_TYPES:
+        raise ValueError(f"Unsupported sort type '{sort_type}', expected one of {SORT_TYPES}")
+
+    rng = np.random.default_rng(seed)
+    cards = [f"Card {i:04d}" for i in range(n_cards)]
+    categories = [f"Category {chr(ord('A') + i % 26)}{i // 26 or ''}" for i in range(n_categories)]
+    topics = rng.integers(0, n_categories, size=n_cards)
+    started = datetime(2024, 1, 1)
+
+    responses = []
+    for participant in range(n_participants):
+        placed = np.where(rng.random(n_cards) < agreement, topics, rng.integers(0, n_categories, size=n_cards))
+
+        if sort_type == 'Open':
+            variants = rng.integers(0, len(_OPEN_NAME_VARIANTS), size=n_categories)
+            names = [_open_category_name(categories[i], variants[i]) for i in range(n_categories)]
+            sorted_cards = {}
+        else:
+            names = list(categories)
+            # Predefined categories are always present, even when left empty
+            sorted_cards = {name: [] for name in names}
+            if sort_type == 'Hybrid' and rng.random() < 0.3:
+                custom = f"Custom {participant % 10}"
+                moved = rng.random(n_cards) < 0.1
+                sorted_cards[custom] = [cards[i] for i in np.flatnonzero(moved)]
+                placed = np.where(moved, -1, placed)
+
+        for card, category in zip(cards, placed):
+            if category >= 0:
+                sorted_cards.setdefault(names[category], []).append(card)
+
+        completed_at = started + timedelta(minutes=participant)
+        responses.append({
+            'id': f"bench-{participant:06d}",
+            'survey_id': 'bench-survey',
+            'submitted_at': completed_at.isoformat(),
+            'response_data': {
+                'sorted_cards': sorted_cards,
+                'completed_at': str(completed_at),
+            },
+        })
+
+    survey_config = {
+        'title': f"Benchmark {sort_type.lower()} sort",
+        'description': f"{n_cards} cards, {n_participants} participants, seed {seed}",
+        'allow_custom_categories': sort_type,
+        'cards': cards,
+        'categories': [] if sort_type == 'Open' else categories,
+    }
+    return {'survey_config': survey_config, 'responses': responses}
+
+
+def _open_category_name(name: str, variant: int) -> str:
+    return _OPEN_NAME_VARIANTS[variant].format(name=name, lower=name.lower(), upper=name.upper())
+
+
+def prepare_benchmark_inputs(responses: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Precompute the inputs of every benchmarked function, so only the function itself is timed.
+
+    Args:
+        responses: Response dictionaries, e.g. from generate_study.
+
+    Returns:
+        Dictionary of intermediate results keyed by name.
+    """
+    groupings, _ = extract_sorted_cards_from_responses(responses)
+    category_assignments, _ = extract_category_assignments_from_responses(responses)
+    cooccurrence, _ = build_cooccurrence_matrix(groupings)
+    similarity = build_similarity_matrix(cooccurrence)
+    category_matrix, _, _ = build_category_assignment_matrix(category_assignments)
+    return {
+        'responses': responses,
+        'groupings': groupings,
+        'category_assignments': category_assignments,
+        'cooccurrence': cooccurrence,
+        'similarity': similarity,
+        'distance': build_distance_matrix(similarity),
+        'category_matrix': category_matrix,
+    }
+
+
+# Benchmarked functions, each called with the output of prepare_benchmark_inputs.
+# Lazy results are converted with dict() so every entry is actually computed.
+BENCHMARKS: Dict[str, Callable[[Dict[str, Any]], Any]] = {
+    'extract_response_columns': lambda inputs: extract_response_columns(inputs['responses']),
+    'build_cooccurrence_matrix': lambda inputs: build_cooccurrence_matrix(inputs['groupings']),
+    'build_similarity_matrix': lambda inputs: build_similarity_matrix(inputs['cooccurrence']),
+    'build_distance_matrix': lambda inputs: build_distance_matrix(inputs['similarity']),
+    'build_analysis_dataframe': lambda inputs: dict(build_analysis_dataframe(inputs['responses'])),
+    'build_analysis_dataframe_condensed': lambda inputs: dict(build_analysis_dataframe(inputs['responses'], condensed=True)),
+    'build_analysis_dataframe_streaming': lambda inputs: dict(build_analysis_dataframe_streaming(iter(inputs['responses']))),
+    'flatten_groupings_to_pairs': lambda inputs: flatten_groupings_to_pairs(inputs['groupings']),
+    'top_card_pairs': lambda inputs: top_card_pairs(inputs['groupings']),
+    'build_category_assignment_matrix': lambda inputs: build_category_assignment_matrix(inputs['category_assignments']),
+    'build_category_consistency_matrix': lambda inputs: build_category_consistency_matrix(inputs['category_matrix']),
+    'build_category_popularity_analysis': lambda inputs: build_category_popularity_analysis(inputs['category_assignments']),
+    'build_card_agreement_metrics': lambda inputs: build_card_agreement_metrics(inputs['category_matrix']),
+    'build_category_agreement_scores': lambda inputs: build_category_agreement_scores(inputs['category_matrix']),
+    'build_comprehensive_category_analysis': lambda inputs: build_comprehensive_category_analysis(inputs['responses']),
+    'build_comprehensive_category_analysis_normalized': lambda inputs: build_comprehensive_category_analysis(
+        inputs['responses'], normalize_categories=True
+    ),
+    'build_card_clustering': lambda inputs: build_card_clustering(inputs['distance']),
+    'CardNeighborIndex': lambda inputs: CardNeighborIndex(inputs['similarity']),
+    'bootstrap_cooccurrence': lambda inputs: bootstrap_cooccurrence(inputs['responses'], n_replicates=100, seed=0),
+    'build_participant_agreement': lambda inputs: build_participant_agreement(inputs['responses']),
+}
+
+
+def measure(function: Callable[[], Any], repeats: int = DEFAULT_REPEATS) -> Dict[str, float]:
+    """
+    Time a function and measure its peak memory.
+
+    Timing runs happen without tracing; one extra run under tracemalloc records the peak of
+    memory allocated by Python and numpy during the call.
+
+    Args:
+        function: Zero-argument function to measure.
+        repeats: Number of timed runs.
+
+    Returns:
+        Dictionary with seconds_min, seconds_median and peak_bytes.
+    """
+    timings = []
+    for _ in range(max(repeats, 1)):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    try:
+        function()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'seconds_min': min(timings),
+        'seconds_median': statistics.median(timings),
+        'peak_bytes': int(peak),
+    }
+
+
+def run_benchmarks(
+    card_counts: Sequence[int] = DEFAULT_CARD_COUNTS,
+    participant_counts: Sequence[int] = DEFAULT_PARTICIPANT_COUNTS,
+    n_categories: int = DEFAULT_CATEGORY_COUNT,
+    sort_type: str = 'Closed',
+    functions: Optional[Sequence[str]] = None,
+    repeats: int = DEFAULT_REPEATS,
+    seed: int = 0,
+    progress: Optional[Callable[[str], None]] = None
+) -> Dict[str, Any]:
+    """
+    Benchmark analysis functions over a grid of study sizes.
+
+    Args:
+        card_counts: Deck sizes to benchmark.
+        participant_counts: Participant counts to benchmark.
+        n_categories: Number of categories of every generated study.
+        sort_type: 'Closed', 'Open' or 'Hybrid'.
+        functions: Names from BENCHMARKS to run. All of them by default.
+        repeats: Timed runs per function and size.
+        seed: Seed of the study generator.
+        progress: Optional callback receiving a line per measurement.
+
+    Returns:
+        Run dictionary with an 'environment' description and one 'results' row per function
+        and size, ready to be saved with save_run.
+    """
+    functions = list(functions) if functions is not None else list(BENCHMARKS)
+    unknown = [name for name in functions if name not in BENCHMARKS]
+    if unknown:
+        raise ValueError(f"Unknown benchmarks {unknown}, expected names from {list(BENCHMARKS)}")
+
+    results = []
+    for n_cards in card_counts:
+        for n_participants in participant_counts:
+            study = generate_study(n_cards, n_participants, n_categories, sort_type, seed)
+            inputs = prepare_benchmark_inputs(study['responses'])
+            for name in functions:
+                measurement = measure(lambda: BENCHMARKS[name](inputs), repeats)
+                results.append({
+                    'function': name,
+                    'n_cards': n_cards,
+                    'n_participants': n_participants,
+                    'n_categories': n_categories,
+                    'sort_type': sort_type,
+                    **measurement,
+                })
+                if progress is not None:
+                    progress(f"{name:<50} {n_cards:>6} cards {n_participants:>7} participants "
+                             f"{measurement['seconds_min'] * 1000:>10.1f} ms {measurement['peak_bytes'] / 2 ** 20:>8.1f} MiB")
+
+    return {
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'environment': {
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'pandas': pd.__version__,
+            'platform': platform.platform(),
+        },
+        'seed': seed,
+        'repeats': repeats,
+        'results': results,
+    }
+
+
+def save_run(run: Dict[str, Any], path: str) -> None:
+    """Save a benchmark run as JSON."""
+    with open(path, 'w', encoding='utf-8') as file:
+        json.dump(run, file, indent=2)
+
+
+def load_run(path: str) -> Dict[str, Any]:
+    """Load a benchmark run saved with save_run."""
+    with open(path, encoding='utf-8') as file:
+        return json.load(file)
+
+
+def compare_runs(
+    baseline: Dict[str, Any],
+    current: Dict[str, Any],
+    threshold: float = DEFAULT_REGRESSION_THRESHOLD
+) -> pd.DataFrame:
+    """
+    Compare two benchmark runs measured on the same sizes.
+
+    Args:
+        baseline: Earlier run, from run_benchmarks or load_run.
+        current: New run.
+        threshold: Relative slowdown or peak memory increase (0.2 = 20%) above which a
+            measurement is a regression. Slowdowns under MIN_REGRESSION_SECONDS and increases
+            under MIN_REGRESSION_BYTES are ignored as noise.
+
+    Returns:
+        DataFrame with one row per function and size present in both runs, holding the
+        baseline and current fastest times and peaks, their ratios and a 'regression' flag.
+    """
+    keys = ['function', 'n_cards', 'n_participants', 'n_categories', 'sort_type']
+    measured = ['seconds_min', 'peak_bytes']
+    merged = pd.DataFrame(baseline['results'])[keys + measured].merge(
+        pd.DataFrame(current['results'])[keys + measured],
+        on=keys,
+        suffixes=('_baseline', '_current'),
+    )
+
+    merged['time_ratio'] = merged['seconds_min_current'] / merged['seconds_min_baseline'].clip(lower=1e-9)
+    merged['memory_ratio'] = merged['peak_bytes_current'] / merged['peak_bytes_baseline'].clip(lower=1)
+    slower = merged['seconds_min_current'] - merged['seconds_min_baseline']
+    larger = merged['peak_bytes_current'] - merged['peak_bytes_baseline']
+    merged['regression'] = (
+        ((merged['time_ratio'] > 1 + threshold) & (slower > MIN_REGRESSION_SECONDS))
+        | ((merged['memory_ratio'] > 1 + threshold) & (larger > MIN_REGRESSION_BYTES))
+    )
+    return merged.sort_values(keys).reset_index(drop=True)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Command line entry point; returns the process exit code."""
+    parser = argparse.ArgumentParser(description="Benchmark the card sorting analysis functions.")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = commands.add_parser('run', help="Run the benchmarks and save the results as JSON.")
+    run_parser.add_argument('--output', required=True, help="Path of the JSON file to write.")
+    run_parser.add_argument('--cards', type=int, nargs='+', help="Deck sizes to benchmark.")
+    run_parser.add_argument('--participants', type=int, nargs='+', help="Participant counts to benchmark.")
+    run_parser.add_argument('--categories', type=int, default=DEFAULT_CATEGORY_COUNT)
+    run_parser.add_argument('--sort-type', choices=SORT_TYPES, default='Closed')
+    run_parser.add_argument('--functions', nargs='+', choices=list(BENCHMARKS), help="Only run these benchmarks.")
+    run_parser.add_argument('--repeats', type=int, default=DEFAULT_REPEATS)
+    run_parser.add_argument('--seed', type=int, default=0)
+    run_parser.add_argument('--quick', action='store_true', help="Use a small size grid.")
+
+    compare_parser = commands.add_parser('compare', help="Compare two saved runs; exits with 1 on regressions.")
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('current')
+    compare_parser.add_argument('--threshold', type=float, default=DEFAULT_REGRESSION_THRESHOLD)
+
+    args = parser.parse_args(argv)
+
+    if args.command == 'run':
+        card_counts, participant_counts = (
+            (QUICK_CARD_COUNTS, QUICK_PARTICIPANT_COUNTS) if args.quick else (DEFAULT_CARD_COUNTS, DEFAULT_PARTICIPANT_COUNTS)
+        )
+        run = run_benchmarks(
+            card_counts=args.cards or card_counts,
+            participant_counts=args.participants or participant_counts,
+            n_categories=args.categories,
+            sort_type=args.sort_type,
+            functions=args.functions,
+            repeats=args.repeats,
+            seed=args.seed,
+            progress=print,
+        )
+        save_run(run, args.output)
+        print(f"Saved {len(run['results'])} measurements to {args.output}")
+        return 0
+
+    comparison = compare_runs(load_run(args.baseline), load_run(args.current), args.threshold)
+    print(comparison.to_string(index=False))
+    regressions = comparison[comparison['regression']]
+    if not regressions.empty:
+        print(f"\n{len(regressions)} regression(s) above {args.threshold:.0%}:")
+        print(regressions[['function', 'n_cards', 'n_participants', 'time_ratio', 'memory_ratio']].to_string(index=False))
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
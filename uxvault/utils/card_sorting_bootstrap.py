@@ -0,0 +1,117 @@
+"""
+Bootstrap confidence intervals for card co-occurrence.
+
+Participants are resampled with replacement and the co-occurrence percentage of every card
+pair is recomputed for each replicate. Replicates are not built one at a time: the
+resampling weights (replicates x responses) are multiplied with the sparse response x pair
+incidence matrix from card_sorting_analysis. The product is computed for one block of pairs
+at a time and reduced to its quantiles straight away, so memory is bounded by the block size
+rather than by pairs x replicates.
+"""
+
+from typing import List, Dict, Any, Optional
+
+import numpy as np
+import pandas as pd
+
+from uxvault.utils.card_sorting_analysis import (
+    ResponseColumns,
+    build_response_pair_incidence,
+    decode_pair_keys,
+    extract_response_columns,
+)
+
+
+# Default number of bootstrap replicates
+DEFAULT_BOOTSTRAP_REPLICATES = 1000
+
+# Size budget of one block of replicate percentages (pairs x replicates float64 values)
+BOOTSTRAP_BLOCK_BYTES = 32 * 1024 * 1024
+
+BOOTSTRAP_COLUMNS = ['card1', 'card2', 'together_count', 'percent', 'ci_lower', 'ci_upper']
+
+
+def bootstrap_weights(n_responses: int, n_replicates: int, rng: np.random.Generator) -> np.ndarray:
+    """
+    Draw how many times each response is picked in each bootstrap replicate.
+
+    Args:
+        n_responses: Number of responses in the selection.
+        n_replicates: Number of replicates to draw.
+        rng: Seeded numpy random generator.
+
+    Returns:
+        Int array of shape (n_replicates, n_responses) whose rows each sum to n_responses.
+    """
+    return rng.multinomial(n_responses, np.full(n_responses, 1.0 / n_responses), size=n_replicates)
+
+
+def bootstrap_cooccurrence(
+    responses: List[Dict[str, Any]],
+    n_replicates: int = DEFAULT_BOOTSTRAP_REPLICATES,
+    confidence: float = 0.95,
+    seed: Optional[int] = None,
+    block_size: Optional[int] = None,
+    columns: Optional[ResponseColumns] = None
+) -> pd.DataFrame:
+    """
+    Percentile bootstrap confidence intervals for the co-occurrence percentage of card pairs.
+
+    Percentages use the same definition as the dashboard heatmap: the number of times two
+    cards were grouped together divided by the number of responses, times 100.
+
+    Args:
+        responses: List of response dictionaries from dashboard
+        n_replicates: Number of bootstrap replicates.
+        confidence: Confidence level of the intervals, e.g. 0.95.
+        seed: Seed of the random generator, so results can be reproduced.
+        block_size: Number of card pairs whose replicates are computed together. Peak memory
+            grows with block_size x n_replicates; by default blocks are sized to stay under
+            BOOTSTRAP_BLOCK_BYTES. Results do not depend on it.
+        columns: Optional result of extract_response_columns(responses).
+
+    Returns:
+        DataFrame with columns card1, card2, together_count, percent, ci_lower and ci_upper,
+        with one row per pair grouped together at least once, sorted by card1 then card2.
+    """
+    if n_replicates < 1:
+        raise ValueError("n_replicates must be at least 1")
+    if not 0 < confidence < 1:
+        raise ValueError("confidence must be between 0 and 1")
+
+    columns = columns if columns is not None else extract_response_columns(responses)
+    pair_incidence, pair_keys, unique_cards = build_response_pair_incidence(columns)
+    n_responses = columns.n_responses
+
+    if n_responses == 0 or len(pair_keys) == 0:
+        return pd.DataFrame(columns=BOOTSTRAP_COLUMNS)
+
+    # One seeded weight matrix is shared by every block of pairs, so results are reproducible
+    # and independent of the block size
+    rng = np.random.default_rng(seed)
+    weights = bootstrap_weights(n_responses, n_replicates, rng).T.astype(np.float64)
+    pairs_by_response = pair_incidence.T.tocsr().astype(np.float64)
+
+    if block_size is None:
+        block_size = max(1, BOOTSTRAP_BLOCK_BYTES // (8 * n_replicates))
+
+    alpha = 1 - confidence
+    lower = np.empty(len(pair_keys), dtype=np.float64)
+    upper = np.empty(len(pair_keys), dtype=np.float64)
+    for start in range(0, len(pair_keys), block_size):
+        stop = min(start + block_size, len(pair_keys))
+        # Replicate percentages of this block of pairs, one column per replicate
+        replicates = pairs_by_response[start:stop] @ weights
+        replicates *= 100.0 / n_responses
+        lower[start:stop], upper[start:stop] = np.quantile(replicates, [alpha / 2, 1 - alpha / 2], axis=1)
+
+    together_count = np.asarray(pair_incidence.sum(axis=0)).ravel()
+    card1, card2 = decode_pair_keys(pair_keys, unique_cards)
+    return pd.DataFrame({
+        'card1': card1,
+        'card2': card2,
+        'together_count': together_count,
+        'percent': together_count * 100.0 / n_responses,
+        'ci_lower': lower,
+        'ci_upper': upper,
+    })
@@ -0,0 +1,149 @@
+"""
+Hierarchical clustering utilities for card sorting analysis.
+
+This module turns the distance matrix produced by card_sorting_analysis into a condensed
+distance vector, computes the linkage and dendrogram coordinates, and memoizes the results
+per selection so dashboard reruns do not recluster the same responses.
+"""
+
+from typing import List, Dict, Any, Union
+
+import numpy as np
+import pandas as pd
+from scipy.cluster import hierarchy
+from scipy.spatial.distance import squareform
+
+from uxvault.utils.analysis_cache import AnalysisCache
+from uxvault.utils.symmetric_matrix import SymmetricMatrix
+
+
+# Linkage methods that are valid for arbitrary (non-Euclidean) distances such as 1 - Jaccard
+LINKAGE_METHODS = ['average', 'complete', 'single', 'weighted']
+
+# Number of clustering results kept by get_card_clustering
+MAX_CACHED_CLUSTERINGS = 16
+
+# Shared by every Streamlit session (thread); AnalysisCache locks its own state
+_clustering_cache = AnalysisCache(max_entries=MAX_CACHED_CLUSTERINGS)
+
+
+def condensed_distances(distance: Union[pd.DataFrame, SymmetricMatrix]) -> np.ndarray:
+    """
+    Convert a distance matrix into a condensed distance vector.
+
+    Only the upper triangle is read into a new vector of length n * (n - 1) / 2; the square
+    matrix is not copied. The diagonal is ignored. A SymmetricMatrix already stores this
+    vector and is used as is.
+
+    Args:
+        distance: Distance matrix (cards x cards) from build_distance_matrix.
+
+    Returns:
+        Condensed distance vector in scipy's pdist order.
+    """
+    if isinstance(distance, SymmetricMatrix):
+        return np.asarray(distance.values, dtype=np.float64)
+    values = distance.to_numpy()
+    return squareform(values, force='tovector', checks=False)
+
+
+def build_card_clustering(
+    distance: Union[pd.DataFrame, SymmetricMatrix],
+    method: str = 'average',
+    optimal_ordering: bool = False,
+    with_dendrogram: bool = True
+) -> Dict[str, Any]:
+    """
+    Run hierarchical clustering of cards on a distance matrix.
+
+    Args:
+        distance: Distance matrix (cards x cards) from build_distance_matrix.
+        method: Linkage method, one of LINKAGE_METHODS.
+        optimal_ordering: Whether to reorder leaves so adjacent cards are as similar as possible.
+            This is slower on large decks.
+        with_dendrogram: Whether to compute dendrogram coordinates for plotting.
+
+    Returns:
+        Dictionary containing:
+        - 'linkage': scipy linkage matrix, or None with fewer than two cards
+        - 'labels': Card labels in matrix order
+        - 'leaf_order': Card labels in dendrogram leaf order
+        - 'dendrogram': Output of scipy's dendrogram(no_plot=True) if with_dendrogram=True, else None
+    """
+    if method not in LINKAGE_METHODS:
+        raise ValueError(f"Unsupported linkage method '{method}', expected one of {LINKAGE_METHODS}")
+
+    raw_labels = distance.labels if isinstance(distance, SymmetricMatrix) else distance.index
+    labels = [str(label) for label in raw_labels]
+    if len(labels) < 2:
+        return {
+            'linkage': None,
+            'labels': labels,
+            'leaf_order': labels,
+            'dendrogram': None
+        }
+
+    condensed = condensed_distances(distance)
+    linkage_matrix = hierarchy.linkage(condensed, method=method)
+    if optimal_ordering:
+        linkage_matrix = hierarchy.optimal_leaf_ordering(linkage_matrix, condensed)
+
+    leaves = hierarchy.leaves_list(linkage_matrix)
+    dendrogram = None
+    if with_dendrogram:
+        dendrogram = hierarchy.dendrogram(linkage_matrix, labels=labels, no_plot=True)
+
+    return {
+        'linkage': linkage_matrix,
+        'labels': labels,
+        'leaf_order': [labels[i] for i in leaves],
+        'dendrogram': dendrogram
+    }
+
+
+def get_card_clustering(
+    distance: Union[pd.DataFrame, SymmetricMatrix],
+    fingerprint: str,
+    method: str = 'average',
+    optimal_ordering: bool = False
+) -> Dict[str, Any]:
+    """
+    Memoized build_card_clustering keyed by the selection fingerprint and linkage options.
+
+    Args:
+        distance: Distance matrix (cards x cards) from build_distance_matrix.
+        fingerprint: Fingerprint of the selected responses, see selection_fingerprint.
+        method: Linkage method, one of LINKAGE_METHODS.
+        optimal_ordering: Whether to apply optimal leaf ordering.
+
+    Returns:
+        The (possibly cached) output of build_card_clustering.
+    """
+    return _clustering_cache.get_or_compute(
+        (fingerprint, method, optimal_ordering),
+        lambda: build_card_clustering(distance, method=method, optimal_ordering=optimal_ordering),
+    )
+
+
+def clear_clustering_cache() -> None:
+    """Drop every memoized clustering result."""
+    _clustering_cache.clear()
+
+
+def assign_clusters(clustering: Dict[str, Any], n_clusters: int) -> pd.Series:
+    """
+    Cut a clustering into a fixed number of flat clusters.
+
+    Args:
+        clustering: Output of build_card_clustering or get_card_clustering.
+        n_clusters: Number of clusters to cut the tree into.
+
+    Returns:
+        Series mapping each label to a cluster number starting at 1.
+    """
+    labels: List[str] = clustering['labels']
+    if clustering['linkage'] is None:
+        return pd.Series(np.ones(len(labels), dtype=int), index=labels, name='cluster')
+
+    clusters = hierarchy.fcluster(clustering['linkage'], t=n_clusters, criterion='maxclust')
+    return pd.Series(clusters, index=labels, name='cluster')
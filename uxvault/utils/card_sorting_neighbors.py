@@ -0,0 +1,130 @@
+"""
+Nearest-neighbour queries over the card similarity matrix.
+
+CardNeighborIndex answers "which cards are most often grouped with this one?". The top
+neighbours of every card are selected once with a partial sort (np.argpartition) over blocks of
+similarity rows, so a query is a dictionary lookup and a slice of a small precomputed array.
+"""
+
+from typing import List, Tuple, Union, Sequence
+
+import numpy as np
+import pandas as pd
+
+from uxvault.utils.symmetric_matrix import SymmetricMatrix
+
+
+# Number of neighbours kept per card
+DEFAULT_MAX_NEIGHBORS = 20
+
+# Number of similarity rows processed at a time while building the index
+NEIGHBOR_BLOCK_SIZE = 512
+
+
+class CardNeighborIndex:
+    """
+    Precomputed top-k neighbours of every card.
+
+    Neighbours are ordered by decreasing similarity, ties by card order in the similarity
+    matrix. A card is never its own neighbour and cards with a similarity of 0 (never grouped
+    together) are not reported.
+    """
+
+    def __init__(
+        self,
+        similarity: Union[pd.DataFrame, SymmetricMatrix],
+        max_neighbors: int = DEFAULT_MAX_NEIGHBORS,
+        block_size: int = NEIGHBOR_BLOCK_SIZE
+    ):
+        """
+        Build the index from a similarity matrix.
+
+        Args:
+            similarity: Similarity matrix (cards x cards) from build_similarity_matrix.
+            max_neighbors: Largest k that queries may ask for.
+            block_size: Number of similarity rows selected at a time, to bound memory.
+        """
+        if isinstance(similarity, SymmetricMatrix):
+            self.labels = [str(label) for label in similarity.labels]
+            values = None
+        else:
+            self.labels = [str(label) for label in similarity.index]
+            values = similarity.to_numpy(dtype=np.float64)
+
+        n_cards = len(self.labels)
+        self.max_neighbors = min(max_neighbors, max(n_cards - 1, 0))
+        self._positions = {label: i for i, label in enumerate(self.labels)}
+        self._neighbors = np.zeros((n_cards, self.max_neighbors), dtype=np.int32)
+        self._scores = np.zeros((n_cards, self.max_neighbors), dtype=np.float64)
+        self._counts = np.zeros(n_cards, dtype=np.int32)
+
+        k = self.max_neighbors
+        if k == 0:
+            return
+
+        for start in range(0, n_cards, block_size):
+            stop = min(start + block_size, n_cards)
+            if values is not None:
+                block = values[start:stop].copy()
+            else:
+                block = np.vstack([similarity.row(label) for label in similarity.labels[start:stop]]).astype(np.float64)
+            rows = np.arange(stop - start)
+            # A card is not its own neighbour
+            block[rows, np.arange(start, stop)] = -np.inf
+
+            # Partial sort: the k largest of each row, in no particular order
+            candidates = np.argpartition(-block, k - 1, axis=1)[:, :k]
+            scores = np.take_along_axis(block, candidates, axis=1)
+
+            # Order the k candidates by decreasing score, then by card position
+            order = np.lexsort((candidates, -scores), axis=1)
+            self._neighbors[start:stop] = np.take_along_axis(candidates, order, axis=1)
+            self._scores[start:stop] = np.take_along_axis(scores, order, axis=1)
+            self._counts[start:stop] = (self._scores[start:stop] > 0).sum(axis=1)
+
+    def __len__(self) -> int:
+        return len(self.labels)
+
+    def __contains__(self, card: str) -> bool:
+        return card in self._positions
+
+    def neighbors(self, card: str, k: int = 10) -> List[Tuple[str, float]]:
+        """
+        Top-k neighbours of one card.
+
+        Args:
+            card: Card name.
+            k: Number of neighbours, at most max_neighbors.
+
+        Returns:
+            List of (neighbour, similarity) tuples, most similar first.
+        """
+        # Asking for more neighbours than there are other cards is fine; more than were kept is not
+        if k > self.max_neighbors and self.max_neighbors < len(self.labels) - 1:
+            raise ValueError(f"k={k} exceeds the {self.max_neighbors} neighbours kept by this index")
+
+        i = self._positions[card]
+        count = min(k, int(self._counts[i]))
+        return [
+            (self.labels[j], float(score))
+            for j, score in zip(self._neighbors[i, :count], self._scores[i, :count])
+        ]
+
+    def query(self, cards: Union[str, Sequence[str]], k: int = 10) -> pd.DataFrame:
+        """
+        Top-k neighbours of one or many cards as a table.
+
+        Args:
+            cards: Card name or list of card names.
+            k: Number of neighbours per card, at most max_neighbors.
+
+        Returns:
+            DataFrame with columns card, rank, neighbor and similarity.
+        """
+        cards = [cards] if isinstance(cards, str) else list(cards)
+        rows = [
+            (card, rank, neighbor, score)
+            for card in cards
+            for rank, (neighbor, score) in enumerate(self.neighbors(card, k), start=1)
+        ]
+        return pd.DataFrame(rows, columns=['card', 'rank', 'neighbor', 'similarity'])
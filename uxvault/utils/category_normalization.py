@@ -0,0 +1,218 @@
+"""
+Category-name normalization for open card sorts.
+
+Participants of open sorts name their own categories, so the same idea shows up as
+"Billing", "billing " and "Bills". This module folds case, whitespace and common word endings
+(plurals, "-ing") and proposes merges of names that then match exactly or nearly. Near matches
+are found through an inverted trigram index (a sparse name x trigram matrix), so only names
+sharing at least one trigram are ever compared. Merges are not chained: every merged name is
+directly similar to the name its group is merged into, so "Shop", "Shopping" and "Shipping"
+never collapse into one category. The resulting mapping is applied before the category
+matrices are built.
+"""
+
+import re
+from typing import List, Dict, Any, Optional, Iterable
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+
+# Minimum trigram Jaccard similarity between folded names for a fuzzy merge
+DEFAULT_MERGE_THRESHOLD = 0.7
+
+# Word endings folded before names are compared, as (suffix, replacement), longest first
+WORD_ENDINGS = (("ings", ""), ("ing", ""), ("ies", "y"), ("s", ""))
+
+# Shortest stem a word ending is folded down to
+MIN_STEM_LENGTH = 3
+
+
+def normalize_category_name(name: Any) -> str:
+    """
+    Fold case and whitespace of a category name.
+
+    Args:
+        name: Category name as entered by a participant.
+
+    Returns:
+        The name casefolded, stripped and with inner whitespace collapsed to single spaces.
+    """
+    return ' '.join(str(name).split()).casefold()
+
+
+def category_stem(name: Any) -> str:
+    """
+    Fold case, whitespace and common word endings of a category name.
+
+    Plurals and "-ing" forms are folded per word ("Bills" and "Billing" both become "bill"),
+    while words ending in "ss", "us" or "is" keep their final "s".
+
+    Args:
+        name: Category name as entered by a participant.
+
+    Returns:
+        The normalized name with every word reduced to its stem.
+    """
+    return ' '.join(_stem_word(word) for word in normalize_category_name(name).split(' '))
+
+
+def _stem_word(word: str) -> str:
+    for suffix, replacement in WORD_ENDINGS:
+        if not word.endswith(suffix) or len(word) - len(suffix) + len(replacement) < MIN_STEM_LENGTH:
+            continue
+        if suffix == "s" and word.endswith(("ss", "us", "is")):
+            continue
+        return word[:len(word) - len(suffix)] + replacement
+    return word
+
+
+def category_trigrams(name: str) -> List[str]:
+    """
+    Distinct character trigrams of a normalized name, padded like PostgreSQL's pg_trgm.
+
+    Args:
+        name: Normalized category name.
+
+    Returns:
+        Sorted list of trigrams.
+    """
+    padded = f"  {name} "
+    return sorted({padded[i:i + 3] for i in range(len(padded) - 2)})
+
+
+def propose_category_merges(
+    names: Iterable[Any],
+    usage: Optional[Dict[Any, int]] = None,
+    threshold: Optional[float] = DEFAULT_MERGE_THRESHOLD
+) -> Dict[str, str]:
+    """
+    Propose a mapping that merges category names differing only in case, whitespace, word
+    endings or spelling.
+
+    Names with the same stem (see category_stem) are always merged. Stems are then grouped
+    around the most used ones: each stem joins the most similar more-used stem whose trigram
+    Jaccard similarity reaches threshold and that contains the same numbers, or leads its own
+    group. Each merged group is named after its most used original name (alphabetically
+    first on ties).
+
+    Args:
+        names: Category names to normalize.
+        usage: Optional number of responses using each name, used to pick merged names.
+        threshold: Minimum trigram similarity for fuzzy merges, or None to only fold case,
+            whitespace and word endings.
+
+    Returns:
+        Dictionary mapping each name that should be renamed to its merged name. Names that
+        keep their label are not included.
+
+    Examples:
+        >>> propose_category_merges(['Billing', 'billing ', 'Bills'], usage={'Billing': 3})
+        {'Bills': 'Billing', 'billing ': 'Billing'}
+        >>> propose_category_merges(['Shop', 'Shopping', 'Shipping', 'Settings', 'Account settings'])
+        {}
+        >>> propose_category_merges(['Acount settings', 'Account settings'], usage={'Account settings': 5})
+        {'Acount settings': 'Account settings'}
+        >>> propose_category_merges(['Group 1', 'Group 2', 'Group 12'])
+        {}
+    """
+    labels = sorted({str(name) for name in names})
+    if not labels:
+        return {}
+
+    usage = {str(name): count for name, count in (usage or {}).items()}
+    stems, stem_codes = np.unique([category_stem(label) for label in labels], return_inverse=True)
+
+    groups = stem_codes
+    if threshold is not None and len(stems) > 1:
+        stem_usage = np.bincount(
+            stem_codes, weights=[usage.get(label, 0) for label in labels], minlength=len(stems)
+        )
+        groups = _similar_stem_groups(stems, stem_usage, threshold)[stem_codes]
+
+    mapping = {}
+    order = np.argsort(groups, kind='stable')
+    for positions in np.split(order, np.flatnonzero(np.diff(groups[order])) + 1):
+        if len(positions) < 2:
+            continue
+        members = [labels[i] for i in positions]
+        merged_name = min(members, key=lambda label: (-usage.get(label, 0), label))
+        mapping.update({label: merged_name for label in members if label != merged_name})
+    return mapping
+
+
+def _similar_stem_groups(stems: np.ndarray, usage: np.ndarray, threshold: float) -> np.ndarray:
+    """
+    Group stems around leaders: each stem joins its most similar leader, or becomes one.
+
+    Stems are visited from most to least used, so every group is led by its most used stem
+    and every member is directly similar to the leader; similarity is never chained.
+    """
+    similarity = _trigram_similarity(stems, threshold)
+
+    leaders = np.full(len(stems), -1, dtype=np.intp)
+    for i in np.lexsort((np.arange(len(stems)), -usage)):
+        row = slice(similarity.indptr[i], similarity.indptr[i + 1])
+        neighbors, scores = similarity.indices[row], similarity.data[row]
+        is_leader = leaders[neighbors] == neighbors
+        if is_leader.any():
+            neighbors, scores = neighbors[is_leader], scores[is_leader]
+            # Most similar leader, the first one in stem order on ties
+            leaders[i] = neighbors[np.lexsort((neighbors, -scores))[0]]
+        else:
+            leaders[i] = i
+    return leaders
+
+
+def _trigram_similarity(keys: np.ndarray, threshold: float) -> sparse.csr_matrix:
+    """Symmetric sparse matrix of the trigram similarities >= threshold between keys."""
+    trigrams = [category_trigrams(key) for key in keys]
+    sizes = np.array([len(key_trigrams) for key_trigrams in trigrams], dtype=np.int64)
+    trigram_codes, _ = pd.factorize(pd.Series([trigram for key_trigrams in trigrams for trigram in key_trigrams]))
+
+    # Name x trigram incidence; its transpose is the inverted index from trigram to names
+    index = sparse.csr_matrix(
+        (np.ones(len(trigram_codes), dtype=np.int64), (np.repeat(np.arange(len(keys)), sizes), trigram_codes)),
+        shape=(len(keys), int(trigram_codes.max()) + 1),
+    )
+
+    # Shared trigram counts, only for names that share at least one trigram
+    shared = sparse.triu(index @ index.T, k=1).tocoo()
+    similarity = shared.data / (sizes[shared.row] + sizes[shared.col] - shared.data)
+    # Numbered names such as "Group 1" and "Group 2" are distinct categories, not typos
+    numbers = np.array([' '.join(re.findall(r'\d+', key)) for key in keys], dtype=object)
+    linked = (similarity >= threshold) & (numbers[shared.row] == numbers[shared.col])
+
+    rows, cols, scores = shared.row[linked], shared.col[linked], similarity[linked]
+    return sparse.csr_matrix(
+        (np.concatenate([scores, scores]), (np.concatenate([rows, cols]), np.concatenate([cols, rows]))),
+        shape=(len(keys), len(keys)),
+    )
+
+
+def apply_category_mapping(
+    category_assignments: Dict[str, Dict[str, List[str]]],
+    mapping: Dict[str, str]
+) -> Dict[str, Dict[str, List[str]]]:
+    """
+    Rename categories in category assignments, merging the cards of categories that collide.
+
+    Args:
+        category_assignments: Dictionary mapping response_id to {category_name: [card1, card2, ...]}
+        mapping: Category renames, as returned by propose_category_merges.
+
+    Returns:
+        New category assignments with the mapping applied.
+    """
+    if not mapping:
+        return category_assignments
+
+    renamed = {}
+    for response_id, response_data in category_assignments.items():
+        merged: Dict[str, List[str]] = {}
+        for category, cards in response_data.items():
+            cards = cards if isinstance(cards, list) else []
+            merged.setdefault(mapping.get(str(category), str(category)), []).extend(cards)
+        renamed[response_id] = merged
+    return renamed
@@ -0,0 +1,178 @@
+"""
+Compact storage for symmetric card x card matrices.
+
+Co-occurrence, similarity and distance matrices are symmetric, so only the values above the
+diagonal need to be stored. SymmetricMatrix keeps that upper triangle as a condensed vector
+(scipy's pdist order) and converts to a square array or DataFrame only on demand.
+"""
+
+from typing import Any, Callable, Dict, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+from scipy.spatial.distance import squareform
+
+
+class SymmetricMatrix:
+    """
+    Symmetric labelled matrix stored as its condensed upper triangle.
+
+    Only the n * (n - 1) / 2 values above the diagonal are stored, plus one scalar shared by
+    every diagonal cell. A transform can be attached with transformed(), which returns a view
+    sharing the same storage; its values are only computed when they are read.
+    """
+
+    def __init__(
+        self,
+        condensed: np.ndarray,
+        labels: Sequence[str],
+        diagonal: Any = 0,
+        transform: Optional[Callable[[np.ndarray], np.ndarray]] = None
+    ):
+        labels = list(labels)
+        n = len(labels)
+        if len(condensed) != n * (n - 1) // 2:
+            raise ValueError(f"Expected {n * (n - 1) // 2} condensed values for {n} labels, got {len(condensed)}")
+
+        self.storage = condensed
+        self.labels = labels
+        self.diagonal = diagonal
+        self.transform = transform
+        self._positions: Dict[str, int] = {label: i for i, label in enumerate(labels)}
+
+    @classmethod
+    def from_square(cls, values: np.ndarray, labels: Sequence[str], diagonal: Any = 0) -> 'SymmetricMatrix':
+        """
+        Build a SymmetricMatrix from a square symmetric array.
+
+        Args:
+            values: Square array; only its upper triangle is read.
+            labels: Row/column labels.
+            diagonal: Value reported for every diagonal cell.
+        """
+        return cls(squareform(values, force='tovector', checks=False), labels, diagonal)
+
+    @classmethod
+    def from_dataframe(cls, frame: pd.DataFrame, diagonal: Any = 0) -> 'SymmetricMatrix':
+        """Build a SymmetricMatrix from a square symmetric DataFrame."""
+        return cls.from_square(frame.to_numpy(), [str(label) for label in frame.index], diagonal)
+
+    def __len__(self) -> int:
+        return len(self.labels)
+
+    def __contains__(self, label: str) -> bool:
+        return label in self._positions
+
+    def __getitem__(self, pair: Tuple[str, str]) -> Any:
+        """Value for a pair of labels, e.g. matrix['card a', 'card b']."""
+        first, second = pair
+        return self.value(self._positions[first], self._positions[second])
+
+    def __repr__(self) -> str:
+        return f"SymmetricMatrix(n={len(self)}, dtype={self.dtype})"
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        return len(self), len(self)
+
+    @property
+    def dtype(self) -> np.dtype:
+        empty = self.storage[:0]
+        return (empty if self.transform is None else self.transform(empty)).dtype
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by the condensed storage (shared with transformed views)."""
+        return int(self.storage.nbytes)
+
+    @property
+    def values(self) -> np.ndarray:
+        """
+        Condensed upper-triangle values.
+
+        Without a transform this is the storage itself (zero-copy). With a transform the values
+        are computed on each access.
+        """
+        return self.storage if self.transform is None else self.transform(self.storage)
+
+    @property
+    def diagonal_value(self) -> Any:
+        if self.transform is None:
+            return self.diagonal
+        return self.transform(np.asarray([self.diagonal]))[0]
+
+    def position(self, label: str) -> int:
+        """Row/column position of a label."""
+        return self._positions[label]
+
+    def pair_index(self, i: int, j: int) -> int:
+        """Position in the condensed vector of the pair (i, j), with i != j."""
+        if i > j:
+            i, j = j, i
+        n = len(self)
+        return n * i - i * (i + 1) // 2 + (j - i - 1)
+
+    def value(self, i: int, j: int) -> Any:
+        """Value at row i, column j."""
+        if i == j:
+            return self.diagonal_value
+        raw = self.storage[self.pair_index(i, j):self.pair_index(i, j) + 1]
+        return (raw if self.transform is None else self.transform(raw))[0]
+
+    def row(self, label: str) -> np.ndarray:
+        """Full row of a label (including its diagonal cell) as a 1-D array."""
+        i = self._positions[label]
+        n = len(self)
+        rows = np.arange(i)
+        # Cells left of the diagonal come from earlier rows, cells right of it from row i's slice
+        left = self.storage[n * rows - rows * (rows + 1) // 2 + (i - rows - 1)]
+        start = self.pair_index(i, i + 1) if i + 1 < n else 0
+        right = self.storage[start:start + n - i - 1]
+        raw = np.concatenate([left, np.asarray([self.diagonal], dtype=self.storage.dtype), right])
+        return raw if self.transform is None else self.transform(raw)
+
+    def iter_row_slices(self):
+        """Yield (i, slice) where the slice selects the stored values of pairs (i, i+1..n-1)."""
+        n = len(self)
+        start = 0
+        for i in range(n - 1):
+            stop = start + n - i - 1
+            yield i, slice(start, stop)
+            start = stop
+
+    def row_sums(self) -> np.ndarray:
+        """Sum of each row, including the diagonal value, computed from the condensed storage."""
+        values = self.values
+        sums = np.zeros(len(self), dtype=values.dtype)
+        for i, row_slice in self.iter_row_slices():
+            segment = values[row_slice]
+            sums[i] += segment.sum()
+            sums[i + 1:] += segment
+        return sums + self.diagonal_value
+
+    def transformed(self, transform: Callable[[np.ndarray], np.ndarray]) -> 'SymmetricMatrix':
+        """
+        Lazy view applying transform elementwise on read. The storage is shared, not copied.
+
+        Args:
+            transform: Vectorized function applied to condensed values (and the diagonal).
+        """
+        if self.transform is not None:
+            inner = self.transform
+            return SymmetricMatrix(self.storage, self.labels, self.diagonal, lambda values: transform(inner(values)))
+        return SymmetricMatrix(self.storage, self.labels, self.diagonal, transform)
+
+    def to_numpy(self) -> np.ndarray:
+        """Square array with the full matrix."""
+        square = squareform(self.values, force='tomatrix', checks=False)
+        np.fill_diagonal(square, self.diagonal_value)
+        return square
+
+    def to_dataframe(self) -> pd.DataFrame:
+        """Square DataFrame with labels on both axes."""
+        return pd.DataFrame(self.to_numpy(), index=self.labels, columns=self.labels)
+
+
+def complement(values: np.ndarray) -> np.ndarray:
+    """1 - values, as a module-level function so transformed matrices stay picklable."""
+    return 1 - values